@@ -0,0 +1,161 @@
+"""Measure dashboard read latency while predictions are published and data is entered.
+
+Runs the same mixed workload against a scratch copy of the attendance schema
+twice: once with SQLite's defaults (rollback journal) and once in the
+concurrent mode from dashboard/sqlite.py. Readers, the nightly publisher and
+data entry each run in their own process, like web workers and
+loadpredictiondb.py do.
+
+    python benchmarks/sqlite_concurrency.py [--seconds 10] [--readers 4]
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard.sqlite import SQLITE_PRAGMAS
+
+LOCATIONS = 20
+HISTORY_DAYS = 3000
+HORIZON_DAYS = 365
+
+
+def connect(path, concurrent):
+    if not concurrent:
+        # Django's defaults: rollback journal, deferred transactions, 5s timeout
+        return sqlite3.connect(path, isolation_level='DEFERRED')
+
+    conn = sqlite3.connect(path, timeout=SQLITE_PRAGMAS['busy_timeout'] / 1000, isolation_level='IMMEDIATE')
+    for pragma, value in SQLITE_PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    return conn
+
+
+def create_database(path, concurrent):
+    conn = connect(path, concurrent)
+    conn.executescript("""
+        CREATE TABLE attendance (id INTEGER PRIMARY KEY, location_id INTEGER, date TEXT, count INTEGER);
+        CREATE INDEX attendance_location_date ON attendance (location_id, date);
+        CREATE TABLE prediction (id INTEGER PRIMARY KEY, location_id INTEGER, date TEXT, value REAL);
+        CREATE INDEX prediction_location_date ON prediction (location_id, date);
+    """)
+    start = date(2017, 1, 1)
+    with conn:
+        conn.executemany(
+            "INSERT INTO attendance (location_id, date, count) VALUES (?, ?, ?)",
+            ((loc, (start + timedelta(days=i)).isoformat(), 3000 + i % 500)
+             for loc in range(LOCATIONS) for i in range(HISTORY_DAYS))
+        )
+    conn.close()
+
+
+def reader(path, concurrent, stop_at, results):
+    """Render-like reads: recent history plus a year of predictions."""
+    conn = connect(path, concurrent)
+    latencies, errors, i = [], 0, 0
+    while time.time() < stop_at:
+        loc = i % LOCATIONS
+        i += 1
+        started = time.perf_counter()
+        try:
+            conn.execute(
+                "SELECT date, count FROM attendance WHERE location_id = ? AND date >= ? ORDER BY date",
+                (loc, '2024-01-01')
+            ).fetchall()
+            conn.execute("SELECT date, value FROM prediction WHERE location_id = ?", (loc,)).fetchall()
+        except sqlite3.OperationalError:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.002)
+    results.put(('reader', latencies, errors))
+
+
+def publisher(path, concurrent, stop_at, results):
+    """Nightly-style publishing: rewrite every location's 365-day horizon in turn."""
+    conn = connect(path, concurrent)
+    runs, errors, loc = 0, 0, 0
+    while time.time() < stop_at:
+        try:
+            with conn:
+                conn.execute("DELETE FROM prediction WHERE location_id = ?", (loc,))
+                conn.executemany(
+                    "INSERT INTO prediction (location_id, date, value) VALUES (?, ?, ?)",
+                    ((loc, (date(2026, 1, 1) + timedelta(days=i)).isoformat(), 3000.0 + runs)
+                     for i in range(HORIZON_DAYS))
+                )
+            runs += 1
+        except sqlite3.OperationalError:
+            errors += 1
+        loc = (loc + 1) % LOCATIONS
+        time.sleep(0.005)  # Stand-in for fitting the next location
+    results.put(('publisher', runs, errors))
+
+
+def data_entry(path, concurrent, stop_at, results):
+    """Staff entering single days of attendance."""
+    conn = connect(path, concurrent)
+    latencies, errors = [], 0
+    while time.time() < stop_at:
+        started = time.perf_counter()
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE attendance SET count = count + 1 WHERE location_id = ? AND date = ?",
+                    (len(latencies) % LOCATIONS, '2025-07-01')
+                )
+        except sqlite3.OperationalError:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.01)
+    results.put(('entry', latencies, errors))
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(concurrent, seconds, readers):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sqlite3')
+        create_database(path, concurrent)
+
+        results = multiprocessing.Queue()
+        stop_at = time.time() + seconds
+        workers = [multiprocessing.Process(target=reader, args=(path, concurrent, stop_at, results))
+                   for _ in range(readers)]
+        workers.append(multiprocessing.Process(target=publisher, args=(path, concurrent, stop_at, results)))
+        workers.append(multiprocessing.Process(target=data_entry, args=(path, concurrent, stop_at, results)))
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+    latencies = [l for kind, values, _ in collected if kind == 'reader' for l in values]
+    summary = {kind: (values, errors) for kind, values, errors in collected if kind != 'reader'}
+    print(f"{'concurrent (WAL)' if concurrent else 'default (rollback journal)'}:")
+    print(f"  reads: {len(latencies)}  errors: {sum(e for k, _, e in collected if k == 'reader')}")
+    print(f"  read latency ms  p50={percentile(latencies, 50) * 1000:.2f}  "
+          f"p95={percentile(latencies, 95) * 1000:.2f}  "
+          f"p99={percentile(latencies, 99) * 1000:.2f}  max={max(latencies) * 1000:.2f}")
+    print(f"  horizons published: {summary['publisher'][0]}  errors: {summary['publisher'][1]}")
+    entry_latencies, entry_errors = summary['entry']
+    print(f"  data entry saves: {len(entry_latencies)}  errors: {entry_errors}  "
+          f"p99={percentile(entry_latencies, 99) * 1000:.2f}ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--readers', type=int, default=4)
+    args = parser.parse_args()
+
+    run(False, args.seconds, args.readers)
+    run(True, args.seconds, args.readers)
@@ -0,0 +1,155 @@
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from dashboard.horizons import prediction_values
+from dashboard.models import AccuracyAggregate, AccuracyMetric, DailyAttendance, PredictionSnapshot, ResidualBin
+
+# Width of the residual-by-weather bins (degrees F / mm)
+BIN_WIDTHS = {'high_temp': 5.0, 'precipitation': 2.5}
+
+
+def weather_bin(variable, value):
+    """Get the start of the residual bin a weather value falls into."""
+    width = BIN_WIDTHS[variable]
+    return math.floor(value / width) * width
+
+
+def apply_metrics(metrics, sign):
+    """Add (sign=1) or remove (sign=-1) metrics from the running aggregates and bins."""
+    aggregates = defaultdict(lambda: [0, 0.0, 0.0, 0.0, 0])
+    bins = defaultdict(lambda: [0, 0.0, 0.0])
+
+    for metric in metrics:
+        totals = aggregates[(metric.location_id, metric.source, metric.horizon)]
+        totals[0] += 1
+        totals[1] += metric.error
+        totals[2] += abs(metric.error)
+        if metric.actual:
+            totals[3] += abs(metric.error) / metric.actual
+            totals[4] += 1
+
+        # Residuals by weather are tracked for the 7-day forecasts, which see the weather
+        if metric.source != 'seven_day':
+            continue
+        for variable in BIN_WIDTHS:
+            value = getattr(metric, variable)
+            if value is not None:
+                totals = bins[(metric.location_id, variable, weather_bin(variable, value))]
+                totals[0] += 1
+                totals[1] += metric.error
+                totals[2] += abs(metric.error)
+
+    # Create and update under one lock, so concurrent scorers can't lose an update
+    with transaction.atomic():
+        for (location_id, source, horizon), (count, error, abs_error, abs_pct, pct_count) in aggregates.items():
+            aggregate, _ = AccuracyAggregate.objects.select_for_update().get_or_create(
+                location_id=location_id, source=source, horizon=horizon
+            )
+            AccuracyAggregate.objects.filter(pk=aggregate.pk).update(
+                count=F('count') + sign * count,
+                sum_error=F('sum_error') + sign * error,
+                sum_abs_error=F('sum_abs_error') + sign * abs_error,
+                sum_abs_pct_error=F('sum_abs_pct_error') + sign * abs_pct,
+                pct_count=F('pct_count') + sign * pct_count,
+            )
+
+        for (location_id, variable, bin_start), (count, residual, abs_residual) in bins.items():
+            residual_bin, _ = ResidualBin.objects.select_for_update().get_or_create(
+                location_id=location_id, variable=variable, bin_start=bin_start
+            )
+            ResidualBin.objects.filter(pk=residual_bin.pk).update(
+                count=F('count') + sign * count,
+                sum_residual=F('sum_residual') + sign * residual,
+                sum_abs_residual=F('sum_abs_residual') + sign * abs_residual,
+            )
+
+
+def snapshot_expiring_predictions(location_id, window_start):
+    """Keep the daily predictions for dates before a new publishing window starts.
+
+    Called before publishing replaces the daily predictions, so days that drop
+    out of the window can still be scored when their attendance arrives.
+    """
+    expiring = prediction_values('daily', ['date', 'issued_on', 'value'], location_id=location_id, end=window_start)
+    PredictionSnapshot.objects.bulk_create([
+        PredictionSnapshot(location_id=location_id, date=d, issued_on=issued_on, value=value)
+        for d, issued_on, value in expiring
+        if issued_on is not None
+    ], update_conflicts=True, unique_fields=['location', 'date'], update_fields=['issued_on', 'value'])
+
+
+def record_actuals(location_id, dates):
+    """Score every prediction generation that covered these dates against the actuals.
+
+    Any earlier scores for the dates are backed out of the running aggregates
+    first, so re-entering or correcting a day's attendance is safe.
+    """
+    dates = set(dates)
+    if not dates:
+        return
+
+    with transaction.atomic():
+        previous = list(AccuracyMetric.objects.filter(location_id=location_id, date__in=dates))
+        apply_metrics(previous, -1)
+        AccuracyMetric.objects.filter(pk__in=[metric.pk for metric in previous]).delete()
+
+        actuals = {
+            entry.date: entry
+            for entry in DailyAttendance.objects.filter(location_id=location_id, date__in=dates)
+        }
+
+        metrics = []
+        for source in ('seven_day', 'daily'):
+            predictions = list(prediction_values(
+                source, ['date', 'issued_on', 'value'], location_id=location_id, dates=actuals.keys()
+            ))
+            if source == 'daily':
+                # Days already dropped from the published window
+                predictions += PredictionSnapshot.objects.filter(
+                    location_id=location_id, date__in=actuals.keys()
+                ).values_list('date', 'issued_on', 'value')
+            # One score per date and generation
+            predictions = {(d, issued_on): value for d, issued_on, value in predictions}
+            for (d, issued_on), value in predictions.items():
+                if issued_on is None or issued_on > d:
+                    continue
+                actual = actuals[d]
+                metrics.append(AccuracyMetric(
+                    location_id=location_id, date=d, source=source, issued_on=issued_on,
+                    horizon=(d - issued_on).days, predicted=value, actual=actual.count,
+                    high_temp=actual.high_temp, precipitation=actual.precipitation,
+                ))
+
+        AccuracyMetric.objects.bulk_create(metrics)
+        apply_metrics(metrics, 1)
+
+
+def get_accuracy_summary(location):
+    """Get the running per-horizon accuracy and residual bins for a location."""
+    return {
+        'horizons': [
+            {
+                'source': aggregate.source,
+                'horizon': aggregate.horizon,
+                'count': aggregate.count,
+                'mae': aggregate.mae,
+                'mape': aggregate.mape,
+                'bias': aggregate.bias,
+            }
+            for aggregate in AccuracyAggregate.objects.filter(location=location, count__gt=0)
+            .order_by('source', 'horizon')
+        ],
+        'residual_bins': [
+            {
+                'variable': residual_bin.variable,
+                'bin_start': residual_bin.bin_start,
+                'count': residual_bin.count,
+                'mean_residual': residual_bin.mean_residual,
+            }
+            for residual_bin in ResidualBin.objects.filter(location=location, count__gt=0)
+            .order_by('variable', 'bin_start')
+        ],
+    }
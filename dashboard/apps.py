@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HelloConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard'
+
+    def ready(self):
+        from dashboard import signals  # noqa: F401
@@ -0,0 +1,32 @@
+from dashboard.accuracy import record_actuals
+from dashboard.models import DailyAttendance
+from dashboard.rollups import refresh_rollups
+
+
+def has_weather_history(location):
+    """Whether a location has attendance with its weather filled in, which the models train on."""
+    return DailyAttendance.objects.filter(
+        location=location, count__isnull=False, high_temp__isnull=False, precipitation__isnull=False
+    ).exists()
+
+
+def save_daily_counts(location, counts):
+    """Bulk create or update daily attendance counts and refresh what depends on them.
+
+    Weather is left for the caller to fill in. Returns (created, updated) row counts.
+    """
+    existing = {
+        entry.date: entry
+        for entry in DailyAttendance.objects.filter(location=location, date__in=counts.keys())
+    }
+    for date_obj, entry in existing.items():
+        entry.count = counts[date_obj]
+    DailyAttendance.objects.bulk_update(existing.values(), ['count'], batch_size=500)
+    created = DailyAttendance.objects.bulk_create([
+        DailyAttendance(date=date_obj, location=location, count=attendance_count)
+        for date_obj, attendance_count in counts.items()
+        if date_obj not in existing
+    ], batch_size=500)
+    refresh_rollups(location.id, counts.keys(), 'actual')
+    record_actuals(location.id, counts.keys())
+    return len(created), len(existing)
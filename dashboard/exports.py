@@ -0,0 +1,95 @@
+import csv
+
+from dashboard.horizons import PREDICTION_MODELS, is_packed, iter_horizon_values
+from dashboard.models import AttendancePrediction, DailyAttendance, SevenDayPrediction
+
+# Dataset name -> (model, exported fields, column headers)
+EXPORTS = {
+    'attendance': (
+        DailyAttendance,
+        ['location__name', 'date', 'count', 'high_temp', 'precipitation'],
+        ['location', 'date', 'count', 'high_temp', 'precipitation'],
+    ),
+    'predictions': (
+        AttendancePrediction,
+        ['location__name', 'date', 'issued_on', 'value'],
+        ['location', 'date', 'issued_on', 'value'],
+    ),
+    'seven_day_predictions': (
+        SevenDayPrediction,
+        ['location__name', 'date', 'issued_on', 'value', 'high_temp', 'precipitation'],
+        ['location', 'date', 'issued_on', 'value', 'high_temp', 'precipitation'],
+    ),
+}
+
+# Column header -> pyarrow type, so a chunk where a column is all None still matches
+PARQUET_TYPES = {
+    'location': 'string',
+    'date': 'date32',
+    'issued_on': 'date32',
+    'count': 'int64',
+    'value': 'float64',
+    'high_temp': 'float64',
+    'precipitation': 'float64',
+}
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """A file-like object that hands back whatever is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_export_rows(dataset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Iterate over a dataset's rows with a server-side cursor."""
+    model, fields, _ = EXPORTS[dataset]
+    if is_packed() and model in PREDICTION_MODELS.values():
+        kind = next(kind for kind, prediction_model in PREDICTION_MODELS.items() if prediction_model is model)
+        return iter_horizon_values(kind, fields)
+    return model.objects.order_by('location_id', 'date', 'id').values_list(*fields).iterator(
+        chunk_size=chunk_size
+    )
+
+
+def stream_csv(dataset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield a dataset as CSV lines, starting with the header."""
+    _, _, headers = EXPORTS[dataset]
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    for row in iter_export_rows(dataset, chunk_size):
+        yield writer.writerow(row)
+
+
+def parquet_schema(dataset):
+    import pyarrow as pa
+
+    _, _, headers = EXPORTS[dataset]
+    return pa.schema([(header, getattr(pa, PARQUET_TYPES[header])()) for header in headers])
+
+
+def write_parquet(dataset, path, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write a dataset to a Parquet file one row group per chunk. Returns the row count."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    _, _, headers = EXPORTS[dataset]
+    schema = parquet_schema(dataset)
+    rows = 0
+    chunk = []
+
+    def flush():
+        writer.write_table(pa.Table.from_pylist([dict(zip(headers, row)) for row in chunk], schema=schema))
+        chunk.clear()
+
+    with pq.ParquetWriter(path, schema) as writer:
+        for row in iter_export_rows(dataset, chunk_size):
+            chunk.append(row)
+            rows += 1
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+    return rows
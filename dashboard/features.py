@@ -0,0 +1,132 @@
+import os
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from prophet.make_holidays import get_holiday_names, make_holidays_df
+
+# Same seasonalities Prophet adds by default for daily data
+SEASONALITIES = {'yearly': (365.25, 10), 'weekly': (7, 3)}
+
+# Prior scales matching Prophet's seasonality_prior_scale and holidays_prior_scale defaults
+SEASONALITY_PRIOR_SCALE = 10.0
+HOLIDAYS_PRIOR_SCALE = 10.0
+
+_feature_sets = {}
+_feature_lock = threading.Lock()
+
+
+class CalendarFeatures:
+    """Holiday indicators and Fourier seasonality terms for a contiguous run of dates.
+
+    `values` is a C-contiguous float64 array with one row per day from `start`,
+    so looking up any date is an index offset rather than a recomputation.
+    """
+
+    def __init__(self, start, names, values, holiday_names):
+        self.start = start
+        self.names = list(names)
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+        self.holiday_names = list(holiday_names)
+
+    @property
+    def end(self):
+        return self.start + pd.Timedelta(days=len(self.values) - 1)
+
+    def covers(self, start, end):
+        return self.start <= start and end <= self.end
+
+    def rows(self, dates):
+        """Get the feature rows for a series of dates."""
+        offsets = (pd.to_datetime(dates).to_numpy() - np.datetime64(self.start, 'D')).astype('timedelta64[D]')
+        return self.values[offsets.astype(np.int64)]
+
+
+def build_calendar_features(start, end, country='US'):
+    """Compute the feature matrix for every day from start to end inclusive."""
+    dates = pd.Series(pd.date_range(start, end, freq='D'))
+
+    columns = []
+    names = []
+    epoch_days = ((dates - pd.Timestamp('1970-01-01')).dt.total_seconds() / (24 * 60 * 60)).to_numpy()
+    for name, (period, order) in SEASONALITIES.items():
+        for i in range(order):
+            x = 2 * np.pi * (i + 1) / period * epoch_days
+            columns += [np.sin(x), np.cos(x)]
+            names += [f"{name}_sin_{i + 1}", f"{name}_cos_{i + 1}"]
+
+    # Every holiday the country can have, so the columns don't depend on the years covered
+    holiday_names = sorted(get_holiday_names(country))
+    holidays = make_holidays_df(list(range(start.year, end.year + 1)), country)
+    holidays['ds'] = pd.to_datetime(holidays['ds'])
+    for holiday_name in holiday_names:
+        holiday_dates = holidays.loc[holidays['holiday'] == holiday_name, 'ds']
+        columns.append(dates.isin(holiday_dates).to_numpy(dtype=np.float64))
+        names.append(f"holiday_{holiday_name}")
+
+    values = np.column_stack(columns) if columns else np.empty((len(dates), 0))
+    return CalendarFeatures(pd.Timestamp(start), names, values, holiday_names)
+
+
+def feature_cache_path(country, start, end):
+    return os.path.join(settings.FEATURE_CACHE_DIR, f"calendar_{country}_{start:%Y%m%d}_{end:%Y%m%d}.npz")
+
+
+def get_calendar_features(start, end, country='US'):
+    """Get calendar features covering start..end, from memory, disk or computed once.
+
+    Features are built for whole years so that fits, predicts and locations
+    asking for overlapping ranges share one cached array.
+    """
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    for features in _feature_sets.get(country, []):
+        if features.covers(start, end):
+            return features
+
+    with _feature_lock:
+        for features in _feature_sets.get(country, []):
+            if features.covers(start, end):
+                return features
+
+        span_start = pd.Timestamp(date(start.year, 1, 1))
+        span_end = pd.Timestamp(date(end.year, 12, 31))
+        path = feature_cache_path(country, span_start, span_end)
+
+        if os.path.exists(path):
+            with np.load(path) as cached:
+                features = CalendarFeatures(
+                    span_start, cached['names'], cached['values'], cached['holiday_names']
+                )
+        else:
+            features = build_calendar_features(span_start, span_end, country)
+            os.makedirs(settings.FEATURE_CACHE_DIR, exist_ok=True)
+            np.savez(
+                path, names=np.array(features.names), values=features.values,
+                holiday_names=np.array(features.holiday_names),
+            )
+
+        _feature_sets.setdefault(country, []).append(features)
+        return features
+
+
+def add_calendar_features(df, country='US'):
+    """Return a copy of a Prophet frame with the calendar feature columns added."""
+    features = get_calendar_features(df['ds'].min(), df['ds'].max(), country)
+    feature_df = pd.DataFrame(features.rows(df['ds']), columns=features.names, index=df.index)
+    return pd.concat([df, feature_df], axis=1)
+
+
+def add_calendar_regressors(m, country='US'):
+    """Model seasonality and holidays through precomputed feature columns.
+
+    Replaces Prophet's own yearly/weekly seasonality and country holidays with
+    equivalent regressors, so frames passed to fit/predict must go through
+    add_calendar_features first.
+    """
+    features = get_calendar_features(pd.Timestamp.now(), pd.Timestamp.now(), country)
+    for name in features.names:
+        prior_scale = HOLIDAYS_PRIOR_SCALE if name.startswith('holiday_') else SEASONALITY_PRIOR_SCALE
+        m.add_regressor(name, prior_scale=prior_scale, standardize=False)
+    return m
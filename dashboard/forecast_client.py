@@ -0,0 +1,195 @@
+import json
+import socket
+import struct
+import threading
+
+import numpy as np
+from django.conf import settings
+
+# Each frame is two 4-byte big-endian lengths, then a JSON message and the raw
+# array data it refers to. Arrays travel as little-endian float64 bytes; in the
+# message each one is replaced by its shape and byte offset into the data.
+FRAME_HEADER = struct.Struct('>II')
+ARRAY_DTYPE = np.dtype('<f8')
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+_connections = threading.local()
+_fallback_logged = False
+
+
+class ForecastServerError(Exception):
+    """The forecast server answered with an error."""
+
+
+class ForecastUnavailable(Exception):
+    """The forecast server is running but timed out or failed, so there is no prediction.
+
+    Predicting in-process instead would load Prophet into every web worker
+    that hits a slow server, so callers should degrade rather than retry.
+    """
+
+
+def pack_arrays(value, buffers):
+    """Swap the numpy arrays in a message for references to bytes appended to `buffers`."""
+    if isinstance(value, np.ndarray):
+        offset = sum(len(buffer) for buffer in buffers)
+        buffers.append(np.ascontiguousarray(value, dtype=ARRAY_DTYPE).tobytes())
+        return {'$array': offset, 'shape': list(value.shape)}
+    if isinstance(value, dict):
+        return {key: pack_arrays(item, buffers) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [pack_arrays(item, buffers) for item in value]
+    return value
+
+
+def unpack_arrays(value, data):
+    """Swap array references in a received message for read-only views into `data`."""
+    if isinstance(value, dict):
+        if '$array' in value:
+            count = int(np.prod(value['shape']))
+            return np.frombuffer(data, dtype=ARRAY_DTYPE, count=count, offset=value['$array']).reshape(value['shape'])
+        return {key: unpack_arrays(item, data) for key, item in value.items()}
+    if isinstance(value, list):
+        return [unpack_arrays(item, data) for item in value]
+    return value
+
+
+def recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError('forecast server connection closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_frame(sock, message):
+    buffers = []
+    body = json.dumps(pack_arrays(message, buffers)).encode('utf-8')
+    data = b''.join(buffers)
+    sock.sendall(FRAME_HEADER.pack(len(body), len(data)) + body + data)
+
+
+def recv_frame(sock):
+    """Read one frame, returning its message with the arrays filled back in."""
+    size, data_size = FRAME_HEADER.unpack(recv_exactly(sock, FRAME_HEADER.size))
+    if size + data_size > MAX_FRAME_BYTES:
+        raise ConnectionError(f"forecast frame of {size + data_size} bytes is too large")
+    body = recv_exactly(sock, size)
+    return unpack_arrays(json.loads(body), recv_exactly(sock, data_size))
+
+
+def get_connection(socket_path=None):
+    """Get this thread's connection to a forecast server, opening it if needed.
+
+    Connects to FORECAST_SERVER_SOCKET unless given another socket path.
+    """
+    socket_path = str(socket_path or settings.FORECAST_SERVER_SOCKET)
+    sockets = getattr(_connections, 'sockets', None)
+    if sockets is None:
+        sockets = _connections.sockets = {}
+    sock = sockets.get(socket_path)
+    if sock is None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(settings.FORECAST_SERVER_TIMEOUT)
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            sock.close()
+            raise
+        sockets[socket_path] = sock
+    return sock
+
+
+def close_connection(socket_path=None):
+    socket_path = str(socket_path or settings.FORECAST_SERVER_SOCKET)
+    sock = getattr(_connections, 'sockets', {}).pop(socket_path, None)
+    if sock is not None:
+        sock.close()
+
+
+def call(method, socket_path=None, **params):
+    """Send one request to the forecast server (at socket_path if given) and return its result.
+
+    Raises FileNotFoundError or ConnectionRefusedError when no server is
+    running, other OSErrors (TimeoutError included) when it stopped answering
+    and ForecastServerError when it answered with an error. A request that
+    timed out is not resent, as the server may still be working on it.
+    """
+    for attempt in range(2):
+        try:
+            sock = get_connection(socket_path)
+            send_frame(sock, {'method': method, 'params': params})
+            response = recv_frame(sock)
+            break
+        except TimeoutError:
+            # The late response would be read as the answer to the next request
+            close_connection(socket_path)
+            raise
+        except OSError:
+            close_connection(socket_path)
+            # A kept-alive connection may have gone stale after a server restart
+            if attempt:
+                raise
+
+    if 'error' in response:
+        raise ForecastServerError(response['error'])
+    return response['result']
+
+
+def call_or_fallback(method, **params):
+    """Call the server, returning None when it isn't running so the caller predicts in-process.
+
+    Raises ForecastUnavailable when the server is running but can't answer.
+    """
+    try:
+        return call(method, **params)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        log_fallback(e)
+        return None
+    except (OSError, ForecastServerError) as e:
+        raise ForecastUnavailable(f"forecast server failed on '{method}': {e}") from e
+
+
+def log_fallback(error):
+    global _fallback_logged
+    if not _fallback_logged:
+        print(f"Forecast server unavailable ({error}), predicting in-process")
+        _fallback_logged = True
+
+
+def predict(location, dates, temperatures, precipitations):
+    """Predict attendance for dates with the given weather.
+
+    Returns (yhat, yhat_lower, yhat_upper) arrays, from the forecast server when
+    it is running or computed in this process otherwise. Raises
+    ForecastUnavailable when the server is running but can't answer.
+    """
+    if settings.FORECAST_SERVER_ENABLED:
+        result = call_or_fallback(
+            'predict', location_id=location.pk, dates=[d.isoformat() for d in dates],
+            temperatures=np.asarray(temperatures, dtype=float),
+            precipitations=np.asarray(precipitations, dtype=float),
+        )
+        if result is not None:
+            return tuple(result[key] for key in ('yhat', 'yhat_lower', 'yhat_upper'))
+
+    from dashboard.forecasting import predict_weather
+    return predict_weather(location, dates, temperatures, precipitations)
+
+
+def predict_scenarios(location, dates, temperatures, precipitations):
+    """Predict the date x temperature x precipitation grid, from the forecast server when possible."""
+    if settings.FORECAST_SERVER_ENABLED:
+        result = call_or_fallback(
+            'scenarios', location_id=location.pk, dates=[d.isoformat() for d in dates],
+            temperatures=np.asarray(temperatures, dtype=float),
+            precipitations=np.asarray(precipitations, dtype=float),
+        )
+        if result is not None:
+            return result
+
+    from dashboard.forecasting import predict_scenarios
+    return predict_scenarios(location, dates, temperatures, precipitations)
@@ -0,0 +1,127 @@
+import os
+import signal
+import socket
+import socketserver
+import sys
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+
+from dashboard import forecasting
+from dashboard.forecast_client import recv_frame, send_frame
+from dashboard.global_model import get_global_model
+from dashboard.models import Location
+from dashboard.publishing import get_forecast_locations
+
+
+def warm_models(log=print):
+    """Fit every location's model up front so the first requests don't pay for it."""
+    if settings.FORECAST_MODE == 'global':
+        get_global_model()
+        log('Fitted the global model.')
+        return 1
+
+    locations = get_forecast_locations()
+    for location in locations:
+        forecasting.get_fitted_model(location)
+        log(f"Fitted model for {location}.")
+    return len(locations)
+
+
+def read_request(params):
+    location = Location.objects.get(pk=params['location_id'])
+    dates = [date.fromisoformat(d) for d in params['dates']]
+    return location, dates, params['temperatures'], params['precipitations']
+
+
+def handle_ping(params):
+    return {'mode': settings.FORECAST_MODE, 'pid': os.getpid()}
+
+
+def handle_predict(params):
+    location, dates, temperatures, precipitations = read_request(params)
+    yhat, lower, upper = forecasting.predict_weather(location, dates, temperatures, precipitations)
+    return {'yhat': np.asarray(yhat), 'yhat_lower': np.asarray(lower), 'yhat_upper': np.asarray(upper)}
+
+
+def handle_scenarios(params):
+    return np.asarray(forecasting.predict_scenarios(*read_request(params)))
+
+
+def handle_reload(params):
+    forecasting.clear_fitted_models()
+    return {'models': warm_models()}
+
+
+HANDLERS = {
+    'ping': handle_ping,
+    'predict': handle_predict,
+    'scenarios': handle_scenarios,
+    'reload': handle_reload,
+}
+
+
+class ForecastRequestHandler(socketserver.BaseRequestHandler):
+    """Answer framed requests on one client connection until the client hangs up."""
+
+    def handle(self):
+        while True:
+            try:
+                message = recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+
+            close_old_connections()
+            try:
+                handler = HANDLERS.get(message.get('method'))
+                if handler is None:
+                    raise ValueError(f"unknown method '{message.get('method')}'")
+                response = {'result': handler(message.get('params') or {})}
+            except Exception as e:
+                response = {'error': f"{type(e).__name__}: {e}"}
+            finally:
+                close_old_connections()
+
+            try:
+                send_frame(self.request, response)
+            except OSError:
+                return
+
+
+class ForecastServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def remove_stale_socket(path):
+    """Remove a socket file left behind by a server that is no longer running."""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.remove(path)
+    else:
+        raise RuntimeError(f"a forecast server is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def serve(path=None, log=print):
+    """Load every model and answer predict and scenario requests on a Unix socket."""
+    path = str(path or settings.FORECAST_SERVER_SOCKET)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    remove_stale_socket(path)
+
+    warm_models(log)
+    # Exit through the finally below on SIGTERM so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    with ForecastServer(path, ForecastRequestHandler) as server:
+        os.chmod(path, 0o660)
+        log(f"Forecast server listening on {path}")
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(path)
@@ -0,0 +1,172 @@
+import hashlib
+import os
+import threading
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+from prophet import Prophet
+from prophet.serialize import model_from_json, model_to_json
+from prophet.utilities import regressor_coefficients
+
+from dashboard.features import add_calendar_features, add_calendar_regressors
+from dashboard.global_model import clear_global_model, get_global_model
+from dashboard.models import DailyAttendance
+from dashboard.training import apply_training_window, get_training_window
+
+# Fitted models by location id, refit only when the location's history changes
+_fitted_models = {}
+_fit_lock = threading.Lock()
+
+
+def get_training_data(location):
+    """Load a location's attendance history with weather as a Prophet training frame."""
+    rows = DailyAttendance.objects.filter(location=location).values_list(
+        'date', 'count', 'high_temp', 'precipitation'
+    )
+    df = pd.DataFrame(list(rows), columns=['ds', 'y', 'high_temp', 'precipitation'])
+    df = df.dropna()
+    df['ds'] = pd.to_datetime(df['ds'])
+    df['y'] = df['y'].astype(float)
+    df['high_temp'] = df['high_temp'].astype(float)
+    df['precipitation'] = df['precipitation'].astype(float)
+    return df
+
+
+def build_model(regressors=('high_temp', 'precipitation')):
+    """Create the Prophet model used for daily predictions.
+
+    Holidays and yearly/weekly seasonality come from the shared calendar feature
+    store, so fit and predict frames need add_calendar_features applied.
+    """
+    m = Prophet(yearly_seasonality=False, weekly_seasonality=False, daily_seasonality=False)
+    add_calendar_regressors(m)
+    for name in regressors:
+        m.add_regressor(name, prior_scale=0.1)
+    return m
+
+
+def get_history_signature(location):
+    """Summarise a location's history and training window so changes to either invalidate its model."""
+    return tuple(DailyAttendance.objects.filter(location=location).aggregate(
+        rows=Count('id'), last=Max('date'), total=Sum('count'),
+        temp=Sum('high_temp'), precip=Sum('precipitation'),
+    ).values()) + get_training_window(location)
+
+
+def stored_model_path(location, regressors, signature):
+    kind = '-'.join(regressors) or 'base'
+    digest = hashlib.sha1(repr(signature).encode()).hexdigest()[:16]
+    return os.path.join(settings.MODEL_CACHE_DIR, f"{location.pk}-{kind}-{digest}.json")
+
+
+def fit_or_load_model(location, regressors, signature):
+    """Load the model stored for this history signature, or fit and store it.
+
+    Stored models let a new process (the nightly job, a restarted server) skip
+    refitting when nothing changed since the last fit.
+    """
+    path = stored_model_path(location, regressors, signature)
+    if os.path.exists(path):
+        with open(path) as f:
+            return model_from_json(f.read())
+
+    m = build_model(regressors)
+    m.fit(apply_training_window(
+        add_calendar_features(get_training_data(location)), *get_training_window(location)
+    ))
+
+    os.makedirs(settings.MODEL_CACHE_DIR, exist_ok=True)
+    prefix = f"{location.pk}-{'-'.join(regressors) or 'base'}-"
+    for old in os.listdir(settings.MODEL_CACHE_DIR):
+        if old.startswith(prefix):
+            try:
+                os.remove(os.path.join(settings.MODEL_CACHE_DIR, old))
+            except FileNotFoundError:
+                pass
+    # Written then renamed so another process never loads a half-written model
+    with open(f"{path}.{os.getpid()}.tmp", 'w') as f:
+        f.write(model_to_json(m))
+    os.replace(f"{path}.{os.getpid()}.tmp", path)
+    return m
+
+
+def get_fitted_model(location, regressors=('high_temp', 'precipitation')):
+    """Get a fitted model for a location, reusing the last fit while its history is unchanged.
+
+    The default model uses the weather regressors; `regressors=()` gives the
+    weather-free model used for the year-ahead predictions.
+    """
+    key = (location.pk, tuple(regressors))
+    signature = get_history_signature(location)
+    cached = _fitted_models.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with _fit_lock:
+        cached = _fitted_models.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        m = fit_or_load_model(location, tuple(regressors), signature)
+        _fitted_models[key] = (signature, m)
+        return m
+
+
+def clear_fitted_models():
+    """Forget every fitted model so the next prediction refits from the database."""
+    with _fit_lock:
+        _fitted_models.clear()
+        if os.path.isdir(settings.MODEL_CACHE_DIR):
+            for stored in os.listdir(settings.MODEL_CACHE_DIR):
+                os.remove(os.path.join(settings.MODEL_CACHE_DIR, stored))
+    clear_global_model()
+
+
+def predict_weather(location, dates, temperatures, precipitations):
+    """Predict a location's attendance for dates with the given weather.
+
+    Returns (yhat, yhat_lower, yhat_upper) arrays from the model FORECAST_MODE selects.
+    """
+    future = pd.DataFrame({'ds': pd.to_datetime(dates)})
+    future['high_temp'] = np.asarray(temperatures, dtype=float)
+    future['precipitation'] = np.asarray(precipitations, dtype=float)
+
+    if settings.FORECAST_MODE == 'global':
+        future['location_id'] = location.pk
+        forecast = get_global_model().predict(future)
+    else:
+        future['floor'] = 0
+        forecast = get_fitted_model(location).predict(add_calendar_features(future))
+    return tuple(forecast[column].to_numpy() for column in ('yhat', 'yhat_lower', 'yhat_upper'))
+
+
+def predict_scenarios(location, dates, temperatures, precipitations):
+    """Predict attendance for every date x high temperature x precipitation combination.
+
+    The model is evaluated once per date with neutral weather; since the weather
+    regressors are additive, each scenario is that baseline plus the regressor
+    coefficients times the scenario weather. Returns an array shaped
+    (len(dates), len(temperatures), len(precipitations)). Raises ValueError
+    for NaN or infinite weather.
+    """
+    temperatures = np.asarray(temperatures, dtype=float)
+    precipitations = np.asarray(precipitations, dtype=float)
+    if not (np.isfinite(temperatures).all() and np.isfinite(precipitations).all()):
+        raise ValueError('Scenario weather must be finite numbers.')
+
+    baseline = predict_weather(location, dates, np.zeros(len(dates)), np.zeros(len(dates)))[0]
+
+    if settings.FORECAST_MODE == 'global':
+        temp_coef, precip_coef = get_global_model().weather_coefficients(location.pk)
+    else:
+        coefficients = regressor_coefficients(get_fitted_model(location)).set_index('regressor')['coef']
+        temp_coef, precip_coef = coefficients['high_temp'], coefficients['precipitation']
+    temp_effect = temp_coef * temperatures
+    precip_effect = precip_coef * precipitations
+
+    return (
+        baseline[:, np.newaxis, np.newaxis]
+        + temp_effect[np.newaxis, :, np.newaxis]
+        + precip_effect[np.newaxis, np.newaxis, :]
+    )
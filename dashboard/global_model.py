@@ -0,0 +1,182 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from django.db.models import Count, Max, Sum
+
+from dashboard.features import get_calendar_features
+from dashboard.models import DailyAttendance, Location
+from dashboard.training import get_training_window, window_sample_weights
+
+# Trend terms are measured in years from here
+TREND_ORIGIN = pd.Timestamp('2017-01-01')
+
+# Matches the 80% intervals Prophet reports by default
+INTERVAL_Z = 1.2816
+
+_global_model = None
+_global_lock = threading.Lock()
+
+
+class UnknownLocationError(ValueError):
+    """The global model has no training rows for a location."""
+
+
+class GlobalForecastModel:
+    """One linear model over every location's history, solved in a single numpy call.
+
+    Attendance is standardised per location (the location's level and scale),
+    and the shared calendar, holiday and weather effects are fitted on the
+    standardised values alongside a per-location intercept and trend. Predicting
+    any mix of locations and dates is one matrix product.
+    """
+
+    def __init__(self, ridge=1.0):
+        self.ridge = ridge
+
+    def design_matrix(self, frame):
+        ds = pd.to_datetime(frame['ds'])
+        calendar = get_calendar_features(ds.min(), ds.max()).rows(ds)
+
+        weather = (frame[['high_temp', 'precipitation']].to_numpy(dtype=float) - self.weather_mean) / self.weather_std
+
+        trend = ((ds - TREND_ORIGIN).dt.days.to_numpy() / 365.25)[:, np.newaxis]
+        locations = np.zeros((len(frame), len(self.location_index)))
+        locations[np.arange(len(frame)), self.location_rows(frame)] = 1.0
+
+        return np.hstack([calendar, weather, locations, locations * trend])
+
+    def location_rows(self, frame):
+        unknown = set(frame['location_id']) - set(self.location_index)
+        if unknown:
+            raise UnknownLocationError(f"No training rows with weather for location(s) {sorted(unknown)}")
+        return np.array([self.location_index[location_id] for location_id in frame['location_id']], dtype=np.int64)
+
+    def trained_locations(self, locations):
+        """Get the locations the model was fitted on, logging the ones it can't predict yet.
+
+        Attendance only counts once its weather is filled in, so a park whose
+        rows are all waiting for enrichment has nothing to predict from.
+        """
+        skipped = [location for location in locations if location.pk not in self.location_index]
+        for location in skipped:
+            print(f"Skipping {location}: no attendance with weather for the global model yet.")
+        return [location for location in locations if location.pk in self.location_index]
+
+    def fit(self, frame, weights=None):
+        """Fit on a frame with location_id, ds, y, high_temp and precipitation columns."""
+        self.location_index = {
+            location_id: i for i, location_id in enumerate(sorted(frame['location_id'].unique()))
+        }
+        rows = self.location_rows(frame)
+        y = frame['y'].to_numpy(dtype=float)
+        weights = np.ones(len(frame)) if weights is None else np.asarray(weights, dtype=float)
+
+        stats = frame.groupby('location_id')['y'].agg(['mean', 'std'])
+        self.level = np.array(stats['mean'].reindex(list(self.location_index)), dtype=float)
+        self.scale = np.array(stats['std'].reindex(list(self.location_index)).fillna(0), dtype=float)
+        self.scale[self.scale == 0] = 1.0
+
+        weather = frame[['high_temp', 'precipitation']].to_numpy(dtype=float)
+        self.weather_mean = weather.mean(axis=0)
+        self.weather_std = weather.std(axis=0)
+        self.weather_std[self.weather_std == 0] = 1.0
+
+        X = self.design_matrix(frame)
+        z = (y - self.level[rows]) / self.scale[rows]
+
+        weighted = X * weights[:, np.newaxis]
+        self.coef = np.linalg.solve(
+            X.T @ weighted + self.ridge * np.eye(X.shape[1]),
+            weighted.T @ z,
+        )
+
+        residuals = z - X @ self.coef
+        self.residual_std = np.sqrt(
+            np.bincount(rows, weights * residuals ** 2, minlength=len(self.location_index))
+            / np.maximum(np.bincount(rows, weights, minlength=len(self.location_index)), 1e-9)
+        )
+        return self
+
+    def predict(self, frame):
+        """Predict a frame with location_id, ds, high_temp and precipitation columns."""
+        rows = self.location_rows(frame)
+        z = self.design_matrix(frame) @ self.coef
+        yhat = self.level[rows] + self.scale[rows] * z
+        interval = INTERVAL_Z * self.residual_std[rows] * self.scale[rows]
+
+        return pd.DataFrame({
+            'location_id': frame['location_id'].to_numpy(),
+            'ds': pd.to_datetime(frame['ds']).to_numpy(),
+            'yhat': yhat,
+            'yhat_lower': yhat - interval,
+            'yhat_upper': yhat + interval,
+        })
+
+    def weather_coefficients(self, location_id):
+        """Get the visitors per degree F and per mm of rain at a location."""
+        if location_id not in self.location_index:
+            raise UnknownLocationError(f"No training rows with weather for location {location_id}")
+        scale = self.scale[self.location_index[location_id]]
+        n_calendar = len(self.coef) - 2 - 2 * len(self.location_index)
+        temp_coef, precip_coef = self.coef[n_calendar:n_calendar + 2]
+        return temp_coef * scale / self.weather_std[0], precip_coef * scale / self.weather_std[1]
+
+    def climatology(self):
+        """Get the average training weather, used when no forecast is available."""
+        return float(self.weather_mean[0]), float(self.weather_mean[1])
+
+
+def get_global_training_data(locations=None):
+    """Load every location's attendance history with weather as one frame."""
+    rows = DailyAttendance.objects.exclude(high_temp=None).exclude(precipitation=None)
+    if locations is not None:
+        rows = rows.filter(location__in=locations)
+    df = pd.DataFrame(
+        list(rows.values_list('location_id', 'date', 'count', 'high_temp', 'precipitation')),
+        columns=['location_id', 'ds', 'y', 'high_temp', 'precipitation'],
+    )
+    df['ds'] = pd.to_datetime(df['ds'])
+    df['y'] = df['y'].astype(float)
+    return df
+
+
+def get_window_weights(history):
+    """Get sample weights applying each location's training window to a global training frame."""
+    windows = {location.pk: get_training_window(location) for location in Location.objects.all()}
+    weights = np.ones(len(history))
+    for location_id, rows in history.groupby('location_id'):
+        weights[rows.index] = window_sample_weights(rows, *windows.get(location_id, ('full', None)))
+    return weights
+
+
+def get_global_signature():
+    """Summarise every location's history and training window, which the global model is fitted on."""
+    return tuple(DailyAttendance.objects.aggregate(
+        rows=Count('id'), last=Max('date'), total=Sum('count'),
+        temp=Sum('high_temp'), precip=Sum('precipitation'),
+    ).values()) + tuple(Location.objects.order_by('pk').values_list('training_window', 'training_years'))
+
+
+def get_global_model():
+    """Get the fitted global model, refitting only when any location's history or window changes."""
+    global _global_model
+    signature = get_global_signature()
+    if _global_model is not None and _global_model[0] == signature:
+        return _global_model[1]
+
+    with _global_lock:
+        if _global_model is None or _global_model[0] != signature:
+            history = get_global_training_data()
+            weights = get_window_weights(history)
+            # Days outside a location's window carry no weight, so leave them out of the solve
+            keep = weights > 0
+            model = GlobalForecastModel().fit(history[keep].reset_index(drop=True), weights[keep])
+            _global_model = (signature, model)
+        return _global_model[1]
+
+
+def clear_global_model():
+    global _global_model
+    with _global_lock:
+        _global_model = None
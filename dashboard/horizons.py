@@ -0,0 +1,206 @@
+from datetime import timedelta
+from itertools import groupby
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from dashboard.models import AttendancePrediction, PredictionHorizon, SevenDayPrediction
+
+HORIZON_DTYPE = np.dtype('<f4')
+
+PREDICTION_MODELS = {'daily': AttendancePrediction, 'seven_day': SevenDayPrediction}
+
+# Row field -> packed series, for reading horizons as if they were prediction rows
+SERIES_FIELDS = {'value': 'yhat', 'high_temp': 'high_temp', 'precipitation': 'precipitation'}
+
+
+def is_packed():
+    return settings.PREDICTION_STORAGE == 'packed'
+
+
+def pack_values(array):
+    return np.ascontiguousarray(array, dtype=HORIZON_DTYPE).tobytes()
+
+
+def unpack_values(horizon):
+    """Get a horizon's values as a dict of series name -> float32 array, one value per day."""
+    values = np.frombuffer(bytes(horizon.values), dtype=HORIZON_DTYPE).reshape(len(horizon.series), horizon.days)
+    return dict(zip(horizon.series, values))
+
+
+def build_horizon(location, kind, issued_on, forecast, future=None):
+    """Pack a forecast (and the weather it was made from) into an unsaved PredictionHorizon.
+
+    Days missing from the forecast's date range are stored as NaN.
+    """
+    dates = pd.to_datetime(forecast['ds']).dt.normalize()
+    start = dates.min()
+    days = (dates.max() - start).days + 1
+    index = (dates - start).dt.days.to_numpy()
+
+    columns = [(name, forecast[name]) for name in ('yhat', 'yhat_lower', 'yhat_upper') if name in forecast]
+    if future is not None:
+        columns += [(name, future[name]) for name in ('high_temp', 'precipitation')]
+
+    array = np.full((len(columns), days), np.nan, dtype=HORIZON_DTYPE)
+    for row, (_, values) in enumerate(columns):
+        array[row, index] = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+
+    return PredictionHorizon(
+        location=location, kind=kind, issued_on=issued_on, start=start.date(), days=days,
+        series=[name for name, _ in columns], values=pack_values(array),
+    )
+
+
+def save_horizon(location, kind, issued_on, forecast, future=None):
+    """Store a prediction run as one row, replacing any run of the same kind issued the same day.
+
+    Only the latest daily run is kept, as AttendancePrediction holds one value
+    per date; 7-day runs are kept per issue date for accuracy tracking.
+    """
+    horizon = build_horizon(location, kind, issued_on, forecast, future)
+    PredictionHorizon.objects.filter(location=location, kind=kind, issued_on=issued_on).delete()
+    if kind == 'daily':
+        PredictionHorizon.objects.filter(location=location, kind=kind).delete()
+    horizon.save()
+    return horizon
+
+
+def get_horizon(location, kind, issued_on=None):
+    """Get the latest prediction run of a kind for a location, or the one issued on a date."""
+    horizons = PredictionHorizon.objects.filter(location=location, kind=kind)
+    if issued_on is not None:
+        horizons = horizons.filter(issued_on=issued_on)
+    return horizons.order_by('-issued_on').first()
+
+
+def has_predictions(location, kind, issued_on):
+    """Whether a run of a kind issued on a date is stored for a location."""
+    if is_packed():
+        return PredictionHorizon.objects.filter(location=location, kind=kind, issued_on=issued_on).exists()
+    return PREDICTION_MODELS[kind].objects.filter(location=location, issued_on=issued_on).exists()
+
+
+def slice_horizon(horizon, start=None, end=None):
+    """Get the days in [start, end) of a horizon as a dict of dates and series arrays.
+
+    The arrays are views into the stored values, so nothing is copied.
+    """
+    first = max(0, (start - horizon.start).days) if start else 0
+    last = min(horizon.days, (end - horizon.start).days) if end else horizon.days
+    first = min(first, last)
+
+    result = {'dates': [horizon.start + timedelta(days=i) for i in range(first, last)]}
+    for name, values in unpack_values(horizon).items():
+        result[name] = values[first:last]
+    return result
+
+
+def to_floats(values):
+    """Get an array as a list of floats, with None for NaN."""
+    floats = values.tolist()
+    for i in np.flatnonzero(np.isnan(values)):
+        floats[i] = None
+    return floats
+
+
+def get_prediction_range(location, kind, start, end):
+    """Get a location's latest predictions for the days in [start, end).
+
+    Returns a dict of dates and value, yhat_lower, yhat_upper, high_temp and
+    precipitation lists, with None where the storage has nothing.
+    """
+    names = ['value', 'yhat_lower', 'yhat_upper', 'high_temp', 'precipitation']
+    if is_packed():
+        horizon = get_horizon(location, kind)
+        if horizon is None:
+            return {'dates': [], **{name: [] for name in names}}
+        days = slice_horizon(horizon, start, end)
+        return {
+            'dates': days['dates'],
+            **{
+                name: to_floats(days[SERIES_FIELDS.get(name, name)])
+                if SERIES_FIELDS.get(name, name) in days else [None] * len(days['dates'])
+                for name in names
+            },
+        }
+
+    # The newest generation of each date wins
+    fields = ['date', 'value'] + (['high_temp', 'precipitation'] if kind == 'seven_day' else [])
+    latest = {
+        row[0]: row[1:]
+        for row in prediction_values(kind, fields, location_id=location.pk, start=start, end=end)
+    }
+    dates = sorted(latest)
+    return {
+        'dates': dates,
+        'value': [latest[d][0] for d in dates],
+        'yhat_lower': [None] * len(dates),
+        'yhat_upper': [None] * len(dates),
+        'high_temp': [latest[d][1] if len(latest[d]) > 1 else None for d in dates],
+        'precipitation': [latest[d][2] if len(latest[d]) > 1 else None for d in dates],
+    }
+
+
+def prediction_values(kind, fields, location_id=None, start=None, end=None, dates=None):
+    """Get stored predictions as tuples of fields, like values_list, from either storage.
+
+    `kind` is 'daily' (AttendancePrediction) or 'seven_day' (SevenDayPrediction)
+    and fields can be location_id, location__name, date, issued_on, value,
+    high_temp and precipitation. Filters to [start, end) and/or a set of dates,
+    and orders by location, date and issue date.
+    """
+    if not is_packed():
+        rows = PREDICTION_MODELS[kind].objects.all()
+        if location_id is not None:
+            rows = rows.filter(location_id=location_id)
+        if start is not None:
+            rows = rows.filter(date__gte=start)
+        if end is not None:
+            rows = rows.filter(date__lt=end)
+        if dates is not None:
+            rows = rows.filter(date__in=dates)
+        return rows.order_by('location_id', 'date', 'issued_on', 'id').values_list(*fields)
+
+    return list(iter_horizon_values(kind, fields, location_id, start, end, dates))
+
+
+def iter_horizon_values(kind, fields, location_id=None, start=None, end=None, dates=None):
+    """Yield packed predictions as tuples of fields, one location at a time."""
+    horizons = PredictionHorizon.objects.filter(kind=kind).select_related('location')
+    if location_id is not None:
+        horizons = horizons.filter(location_id=location_id)
+    if dates is not None:
+        dates = set(dates)
+        if not dates:
+            return
+        horizons = horizons.filter(start__lte=max(dates))
+    if end is not None:
+        horizons = horizons.filter(start__lt=end)
+
+    for _, location_horizons in groupby(horizons.order_by('location_id', 'issued_on'), key=lambda h: h.location_id):
+        rows = []
+        for horizon in location_horizons:
+            days = slice_horizon(horizon, start, end)
+            # Days the run didn't cover are NaN and have no row
+            keep = [
+                i for i, d in enumerate(days['dates'])
+                if not np.isnan(days['yhat'][i]) and (dates is None or d in dates)
+            ]
+            if not keep:
+                continue
+
+            columns = {
+                'location_id': [horizon.location_id] * len(keep),
+                'location__name': [horizon.location.name] * len(keep),
+                'date': [days['dates'][i] for i in keep],
+                'issued_on': [horizon.issued_on] * len(keep),
+            }
+            for field, series in SERIES_FIELDS.items():
+                values = days.get(series)
+                columns[field] = to_floats(values[keep]) if values is not None else [None] * len(keep)
+            rows += zip(columns['date'], columns['issued_on'], zip(*(columns[field] for field in fields)))
+
+        rows.sort(key=lambda row: row[:2])
+        yield from (values for _, _, values in rows)
@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+
+from dashboard.attendance import save_daily_counts
+from dashboard.horizons import prediction_values
+from dashboard.models import IntradayCounts
+
+BUCKET_MINUTES = 15
+BUCKETS_PER_DAY = 24 * 60 // BUCKET_MINUTES
+BUCKETS_PER_HOUR = 60 // BUCKET_MINUTES
+COUNT_DTYPE = np.dtype('<u4')
+
+# Same-weekday days averaged into the hourly profile
+PROFILE_DAYS = 8
+
+
+def pack_counts(array):
+    return np.ascontiguousarray(array, dtype=COUNT_DTYPE).tobytes()
+
+
+def unpack_counts(row):
+    """Get a row's counts as an (entrances, 96) array."""
+    return np.frombuffer(bytes(row.counts), dtype=COUNT_DTYPE).reshape(len(row.entrances), BUCKETS_PER_DAY)
+
+
+def read_gate_counts(path_or_file, chunksize=None):
+    """Read timestamp,entrance,count turnstile readings from a CSV."""
+    return pd.read_csv(
+        path_or_file, usecols=['timestamp', 'entrance', 'count'],
+        dtype={'entrance': str, 'count': 'int64'}, chunksize=chunksize,
+    )
+
+
+def to_buckets(location, readings):
+    """Turn readings into date, bucket, entrance, count columns in the park's local time."""
+    timestamps = pd.to_datetime(readings['timestamp'], format='mixed')
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert(location.timezone).dt.tz_localize(None)
+    return pd.DataFrame({
+        'date': timestamps.dt.date,
+        'bucket': (timestamps.dt.hour * 60 + timestamps.dt.minute) // BUCKET_MINUTES,
+        'entrance': readings['entrance'].to_numpy(),
+        'count': readings['count'].to_numpy(),
+    })
+
+
+def bucket_readings(location, readings):
+    """Total readings per date, entrance and 15-minute bucket.
+
+    Readings that fall in the same bucket are summed, so feeds reporting more
+    often than every 15 minutes add up. Raises ValueError on negative counts.
+    """
+    negative = int((readings['count'] < 0).sum())
+    if negative:
+        raise ValueError(f"{negative} readings have negative counts")
+    return to_buckets(location, readings).groupby(['date', 'entrance', 'bucket'], as_index=False)['count'].sum()
+
+
+def ingest_gate_counts(location, buckets, seen=None):
+    """Store bucketed turnstile readings (from bucket_readings) in the packed per-day rows.
+
+    Each total replaces what is already stored for that bucket, so re-sending
+    a file is safe. `seen` collects the (date, entrance, bucket) keys written
+    during one load: buckets already in it are added to instead, so a file
+    read in chunks gives the same totals as one read whole. Returns the dates
+    that were touched.
+    """
+    seen = set() if seen is None else seen
+    dates = sorted(buckets['date'].unique())
+    existing = {
+        row.date: row
+        for row in IntradayCounts.objects.filter(location=location, date__in=dates)
+    }
+
+    created, updated = [], []
+    for day, day_buckets in buckets.groupby('date'):
+        row = existing.get(day)
+        entrances = list(row.entrances) if row else []
+        entrances += sorted(set(day_buckets['entrance']) - set(entrances))
+
+        array = np.zeros((len(entrances), BUCKETS_PER_DAY), dtype=np.int64)
+        if row:
+            array[:len(row.entrances)] = unpack_counts(row)
+        rows = day_buckets['entrance'].map({name: i for i, name in enumerate(entrances)}).to_numpy()
+        columns = day_buckets['bucket'].to_numpy()
+        keys = list(zip([day] * len(day_buckets), day_buckets['entrance'], columns.tolist()))
+        earlier = np.array([key in seen for key in keys], dtype=bool)
+        array[rows, columns] = np.where(earlier, array[rows, columns], 0) + day_buckets['count'].to_numpy()
+        seen.update(keys)
+        # Saturate rather than wrap around if a bucket ever passes the uint32 range
+        packed = pack_counts(np.minimum(array, np.iinfo(COUNT_DTYPE).max))
+
+        if row:
+            row.entrances, row.counts = entrances, packed
+            updated.append(row)
+        else:
+            created.append(IntradayCounts(location=location, date=day, entrances=entrances, counts=packed))
+
+    IntradayCounts.objects.bulk_create(created, batch_size=500)
+    IntradayCounts.objects.bulk_update(updated, ['entrances', 'counts'], batch_size=500)
+    cache.delete_many([f"intraday-profile:{location.pk}:{weekday}" for weekday in range(7)])
+    return dates
+
+
+def rollup_daily_attendance(location, dates):
+    """Total the gate counts for finished days into DailyAttendance.
+
+    Today is left alone until it is over, so a partial day never shows up as
+    actual attendance. Returns the date -> total counts that were saved.
+    """
+    today = location.local_today()
+    rows = IntradayCounts.objects.filter(location=location, date__in=[d for d in dates if d < today])
+    totals = {row.date: int(unpack_counts(row).sum(dtype=np.int64)) for row in rows}
+    if totals:
+        save_daily_counts(location, totals)
+    return totals
+
+
+def get_hourly_profile(location, weekday):
+    """Get the average share of a day's visitors arriving in each hour for a weekday (Monday is 0).
+
+    Averages the last PROFILE_DAYS days with gate counts on the same weekday,
+    or every recent day when that weekday has none. Returns None without data.
+    """
+    cache_key = f"intraday-profile:{location.pk}:{weekday}"
+    profile = cache.get(cache_key)
+    if profile is not None:
+        return profile
+
+    rows = IntradayCounts.objects.filter(location=location).order_by('-date')
+    # Django's week_day runs 1-7 from Sunday
+    same_day = list(rows.filter(date__week_day=(weekday + 1) % 7 + 1)[:PROFILE_DAYS])
+    days = same_day or list(rows[:PROFILE_DAYS])
+    if not days:
+        return None
+
+    hourly = np.stack([
+        unpack_counts(row).sum(axis=0, dtype=np.int64).reshape(24, BUCKETS_PER_HOUR).sum(axis=1)
+        for row in days
+    ]).astype(float)
+    totals = hourly.sum(axis=1, keepdims=True)
+    hourly = hourly[totals[:, 0] > 0] / totals[totals[:, 0] > 0]
+    if not len(hourly):
+        return None
+
+    profile = hourly.mean(axis=0).tolist()
+    cache.set(cache_key, profile, settings.PREDICTION_CACHE_SECONDS)
+    return profile
+
+
+def get_daily_prediction(location, day):
+    """Get the latest 7-day prediction for a date, or the yearly prediction if there isn't one."""
+    for kind in ('seven_day', 'daily'):
+        predictions = list(prediction_values(kind, ['issued_on', 'value'], location_id=location.pk, dates=[day]))
+        if predictions:
+            # Ordered by issue date, so the last is the latest
+            return predictions[-1][1]
+    return None
+
+
+def get_day_curve(location, day):
+    """Get a day's hourly arrivals: actual counts if stored, and the predicted curve.
+
+    The predicted curve spreads the daily prediction over the hours by the
+    weekday's hourly profile.
+    """
+    row = IntradayCounts.objects.filter(location=location, date=day).first()
+    actual = by_entrance = None
+    if row is not None:
+        hourly = unpack_counts(row).reshape(len(row.entrances), 24, BUCKETS_PER_HOUR).sum(axis=2, dtype=np.int64)
+        actual = hourly.sum(axis=0).tolist()
+        by_entrance = dict(zip(row.entrances, hourly.tolist()))
+
+    predicted_total = get_daily_prediction(location, day)
+    profile = get_hourly_profile(location, day.weekday())
+    predicted = None
+    if predicted_total is not None and profile is not None:
+        predicted = (np.asarray(profile) * predicted_total).tolist()
+
+    return {
+        'date': day.isoformat(),
+        'hours': list(range(24)),
+        'actual': actual,
+        'actual_by_entrance': by_entrance,
+        'predicted_total': predicted_total,
+        'predicted': predicted,
+    }
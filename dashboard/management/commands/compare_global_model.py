@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from dashboard.features import add_calendar_features
+from dashboard.forecasting import build_model
+from dashboard.global_model import GlobalForecastModel, get_global_training_data
+from dashboard.models import Location
+
+
+class Command(BaseCommand):
+    help = 'Backtest the pooled global model against per-location Prophet fits.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--holdout', type=int, default=56,
+                            help='Days at the end of each history to hold out for scoring.')
+
+    def handle(self, *args, **options):
+        history = get_global_training_data()
+        if history.empty:
+            self.stdout.write('No attendance history with weather to compare on.')
+            return
+
+        cutoffs = history.groupby('location_id')['ds'].max() - pd.Timedelta(days=options['holdout'])
+        is_test = (history['ds'] > history['location_id'].map(cutoffs)).to_numpy()
+        train, test = history[~is_test], history[is_test]
+
+        names = dict(Location.objects.filter(pk__in=cutoffs.index).values_list('pk', 'name'))
+        prophet_errors = {}
+        prophet_seconds = 0.0
+        for location_id, location_train in train.groupby('location_id'):
+            location_test = test[test['location_id'] == location_id]
+            started = time.perf_counter()
+            m = build_model()
+            m.fit(add_calendar_features(location_train.drop(columns='location_id')))
+            prophet_seconds += time.perf_counter() - started
+
+            future = add_calendar_features(location_test.drop(columns=['location_id', 'y']))
+            future['floor'] = 0
+            prediction = m.predict(future)['yhat'].to_numpy()
+            prophet_errors[location_id] = np.abs(prediction - location_test['y'].to_numpy())
+
+        started = time.perf_counter()
+        model = GlobalForecastModel().fit(train)
+        global_seconds = time.perf_counter() - started
+        prediction = model.predict(test)['yhat'].to_numpy()
+        global_errors = np.abs(prediction - test['y'].to_numpy())
+
+        self.stdout.write(f"{'location':<24} {'days':>5} {'prophet MAE':>12} {'global MAE':>12}")
+        for location_id, errors in prophet_errors.items():
+            rows = (test['location_id'] == location_id).to_numpy()
+            self.stdout.write(
+                f"{names.get(location_id, location_id):<24} {len(errors):>5} "
+                f"{errors.mean():>12.0f} {global_errors[rows].mean():>12.0f}"
+            )
+        self.stdout.write(
+            f"{'all locations':<24} {len(global_errors):>5} "
+            f"{np.concatenate(list(prophet_errors.values())).mean():>12.0f} {global_errors.mean():>12.0f}"
+        )
+        self.stdout.write(
+            f"Fit time: {prophet_seconds:.2f}s for {len(prophet_errors)} Prophet fits, "
+            f"{global_seconds:.3f}s for the global model."
+        )
@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.exports import EXPORT_CHUNK_SIZE, EXPORTS, stream_csv, write_parquet
+
+
+class Command(BaseCommand):
+    help = 'Export attendance history or predictions as CSV or Parquet in constant memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+        parser.add_argument('--output', help='File to write to (CSV defaults to stdout).')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        dataset = options['dataset']
+        chunk_size = options['chunk_size']
+
+        if options['format'] == 'parquet':
+            if not options['output']:
+                raise CommandError('Parquet export needs --output.')
+            try:
+                rows = write_parquet(dataset, options['output'], chunk_size)
+            except ImportError:
+                raise CommandError('Parquet export requires pyarrow (pip install pyarrow).')
+            self.stderr.write(f"Exported {rows} {dataset} rows to {options['output']}.")
+            return
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as f:
+                f.writelines(stream_csv(dataset, chunk_size))
+        else:
+            sys.stdout.writelines(stream_csv(dataset, chunk_size))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard import forecast_client
+from dashboard.forecast_server import serve
+
+
+class Command(BaseCommand):
+    help = 'Run the resident forecast server that holds every fitted model and answers web workers over a Unix socket.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', help='Socket path (defaults to FORECAST_SERVER_SOCKET).')
+        parser.add_argument('--reload', action='store_true',
+                            help='Tell the running server to refit its models, then exit.')
+
+    def handle(self, *args, **options):
+        if options['reload']:
+            try:
+                result = forecast_client.call('reload', socket_path=options['socket'])
+            except (FileNotFoundError, ConnectionRefusedError) as e:
+                raise CommandError(f"No forecast server is running: {e}")
+            except (OSError, forecast_client.ForecastServerError) as e:
+                raise CommandError(f"Forecast server didn't finish reloading: {e}")
+            self.stdout.write(f"Forecast server reloaded {result['models']} models.")
+            return
+
+        serve(options['socket'], self.stdout.write)
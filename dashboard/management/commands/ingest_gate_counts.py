@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.intraday import bucket_readings, ingest_gate_counts, read_gate_counts, rollup_daily_attendance
+from dashboard.models import Location
+from dashboard.profiling import PROFILE_FORMATS, profile
+from dashboard.sqlite import write
+
+
+class Command(BaseCommand):
+    help = 'Load 15-minute turnstile counts (timestamp,entrance,count CSV) and roll finished days into daily attendance.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file of timestamp,entrance,count readings.')
+        parser.add_argument('--location', default='Safari Park', help='Location name (default: Safari Park).')
+        parser.add_argument('--chunk-size', type=int, default=100000, help='Readings to load per batch.')
+        parser.add_argument('--no-rollup', action='store_true', help="Don't update daily attendance.")
+        parser.add_argument('--profile', nargs='?', const='speedscope', choices=sorted(PROFILE_FORMATS),
+                            help='Save a sampling profile of the load.')
+
+    def handle(self, *args, **options):
+        try:
+            location = Location.objects.get(name=options['location'])
+        except Location.DoesNotExist:
+            raise CommandError(f"{options['location']} location not found in database.")
+
+        with profile('ingest_gate_counts', options['profile'], enabled=bool(options['profile'])):
+            dates = set()
+            readings = 0
+            # Buckets written so far, so readings split across chunks add up
+            seen = set()
+            for chunk in read_gate_counts(options['path'], chunksize=options['chunk_size']):
+                try:
+                    buckets = bucket_readings(location, chunk)
+                except ValueError as e:
+                    raise CommandError(f"Rejected readings {readings + 1}-{readings + len(chunk)}: {e}")
+                # Only the upsert runs on the writer, so parsing doesn't hold up other writes
+                dates.update(write(ingest_gate_counts, location, buckets, seen))
+                readings += len(chunk)
+            self.stdout.write(f"Loaded {readings} readings covering {len(dates)} days for {location}.")
+
+            if options['no_rollup'] or not dates:
+                return
+
+            totals = write(rollup_daily_attendance, location, sorted(dates))
+            if totals:
+                # Imported here as views runs django.setup() on import
+                from dashboard.views import enrich_attendance_weather
+                enrich_attendance_weather(location.pk, list(totals))
+            self.stdout.write(f"Updated daily attendance for {len(totals)} finished days.")
@@ -0,0 +1,63 @@
+from itertools import groupby
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from dashboard.horizons import is_packed, save_horizon
+from dashboard.models import AttendancePrediction, Location, SevenDayPrediction
+from dashboard.rollups import rebuild_rollups
+
+
+def prediction_frame(rows, columns):
+    """Turn (date, value, ...) rows into a forecast frame with one row per date."""
+    frame = pd.DataFrame(rows, columns=['ds', 'yhat', *columns])
+    frame['ds'] = pd.to_datetime(frame['ds'])
+    return frame.drop_duplicates('ds', keep='last').reset_index(drop=True)
+
+
+class Command(BaseCommand):
+    help = 'Convert per-day prediction rows into packed horizons, for PREDICTION_STORAGE = "packed".'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--location', help='Only convert this location (by name).')
+        parser.add_argument('--keep-rows', action='store_true', help="Don't delete the converted rows.")
+
+    def handle(self, *args, **options):
+        if not is_packed():
+            raise CommandError('Set WILDCAST_PREDICTION_STORAGE=packed first, so the packed predictions are the ones read.')
+
+        locations = Location.objects.all()
+        if options['location']:
+            locations = locations.filter(name=options['location'])
+
+        for location in locations:
+            with transaction.atomic():
+                seven_day = SevenDayPrediction.objects.filter(location=location)
+                rows = seven_day.order_by('issued_on', 'date', 'id').values_list(
+                    'issued_on', 'date', 'value', 'high_temp', 'precipitation'
+                )
+                generations = 0
+                for issued_on, generation in groupby(rows, key=lambda row: row[0]):
+                    generation = [row[1:] for row in generation]
+                    frame = prediction_frame(generation, ['high_temp', 'precipitation'])
+                    # Rows from before generations were tracked count as issued on their first day
+                    save_horizon(location, 'seven_day', issued_on or generation[0][0], frame, frame)
+                    generations += 1
+
+                daily = AttendancePrediction.objects.filter(location=location)
+                rows = list(daily.order_by('date', 'id').values_list('date', 'value', 'issued_on'))
+                if rows:
+                    # Refreshes keep each day's own issue date; the run is as new as its newest day
+                    issued_on = max((row[2] for row in rows if row[2]), default=location.local_today())
+                    save_horizon(location, 'daily', issued_on, prediction_frame(rows, ['issued_on']))
+
+                if not options['keep_rows']:
+                    seven_day.delete()
+                    daily.delete()
+                # Packed values are float32, so the bucket totals move slightly
+                rebuild_rollups(location.pk, 'predicted')
+
+            self.stdout.write(
+                f"Packed {generations} 7-day generations and {len(rows)} daily predictions for {location}."
+            )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.models import Location
+from dashboard.rollups import SOURCES, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the weekly and monthly attendance rollups from the daily rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--location', help='Only rebuild this location (by name).')
+
+    def handle(self, *args, **options):
+        locations = Location.objects.all()
+        if options['location']:
+            locations = locations.filter(name=options['location'])
+
+        for location in locations:
+            for source in SOURCES:
+                rebuild_rollups(location.pk, source)
+            self.stdout.write(f"Rebuilt rollups for {location}.")
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.profiling import PROFILE_FORMATS, profile
+from dashboard.scheduler import build_schedule, run_job, run_scheduler
+
+
+class Command(BaseCommand):
+    help = 'Run the built-in scheduler that pre-warms forecasts and caches before each day rolls over.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--list', action='store_true', help='List the scheduled jobs and exit.')
+        parser.add_argument('--run', metavar='JOB', help='Run one job now by name and exit.')
+        parser.add_argument('--profile', nargs='?', const='speedscope', choices=sorted(PROFILE_FORMATS),
+                            help='With --run, save a sampling profile of the job.')
+
+    def handle(self, *args, **options):
+        jobs = build_schedule()
+
+        if options['list']:
+            for job in jobs:
+                self.stdout.write(str(job))
+            return
+
+        if options['run']:
+            matching = [job for job in jobs if job.name == options['run']]
+            if not matching:
+                raise CommandError(f"No scheduled job named '{options['run']}'.")
+            with profile(matching[0].name, options['profile'], enabled=bool(options['profile'])):
+                run_job(matching[0], self.stdout.write)
+            return
+
+        self.stdout.write(f"Scheduler started with {len(jobs)} jobs.")
+        run_scheduler(jobs, self.stdout.write)
@@ -0,0 +1,97 @@
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from dashboard.features import add_calendar_features
+from dashboard.forecasting import build_model, get_training_data
+from dashboard.models import Location
+from dashboard.training import DAYS_PER_YEAR, apply_training_window
+
+CANDIDATE_WINDOWS = [
+    ('years', 1), ('years', 2), ('years', 3), ('years', 5),
+    ('weighted', 1), ('weighted', 2),
+    ('weekly', 1), ('weekly', 2), ('weekly', 3),
+]
+
+
+def describe_window(mode, years):
+    if mode == 'full':
+        return 'full history'
+    if mode == 'weighted':
+        return f"weighted, {years:g}y half-life"
+    if mode == 'weekly':
+        return f"daily {years:g}y, weekly before"
+    return f"last {years:g}y"
+
+
+class Command(BaseCommand):
+    help = "Pick each location's smallest training window whose backtest error is close to the full history's."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--location', help='Only tune this location (by name).')
+        parser.add_argument('--holdout', type=int, default=56,
+                            help='Days at the end of the history to hold out for scoring.')
+        parser.add_argument('--tolerance', type=float, default=0.05,
+                            help='Largest allowed MAE increase over the full history, as a fraction.')
+        parser.add_argument('--dry-run', action='store_true', help="Report without saving the chosen window.")
+
+    def backtest(self, train, test, mode, years):
+        window = apply_training_window(train, mode, years)
+        started = time.perf_counter()
+        m = build_model()
+        m.fit(window)
+        seconds = time.perf_counter() - started
+        prediction = m.predict(test)['yhat'].to_numpy()
+        return {
+            'mode': mode, 'years': years, 'rows': len(window), 'seconds': seconds,
+            'mae': float(np.abs(prediction - test['y'].to_numpy()).mean()),
+        }
+
+    def handle(self, *args, **options):
+        locations = Location.objects.filter(dailyattendance__isnull=False).distinct()
+        if options['location']:
+            locations = locations.filter(name=options['location'])
+
+        for location in locations:
+            history = add_calendar_features(get_training_data(location))
+            cutoff = history['ds'].max() - pd.Timedelta(days=options['holdout'])
+            train, test = history[history['ds'] <= cutoff], history[history['ds'] > cutoff].copy()
+            test['floor'] = 0
+            if train.empty or test.empty:
+                self.stdout.write(f"{location}: not enough history to backtest.")
+                continue
+
+            span_years = (train['ds'].max() - train['ds'].min()).days / DAYS_PER_YEAR
+            results = [self.backtest(train, test, 'full', None)]
+            results += [
+                self.backtest(train, test, mode, years)
+                for mode, years in CANDIDATE_WINDOWS
+                if years < span_years
+            ]
+
+            full = results[0]
+            self.stdout.write(f"{location}:")
+            for result in results:
+                self.stdout.write(
+                    f"  {describe_window(result['mode'], result['years']):<28} {result['rows']:>6} rows "
+                    f"{result['seconds']:>6.2f}s  MAE {result['mae']:.0f}"
+                )
+
+            allowed = full['mae'] * (1 + options['tolerance'])
+            best = min(
+                (result for result in results if result['mae'] <= allowed),
+                key=lambda result: (result['rows'], result['mae']),
+            )
+            saving = 1 - best['seconds'] / full['seconds'] if full['seconds'] else 0
+            self.stdout.write(
+                f"  Chose {describe_window(best['mode'], best['years'])}: "
+                f"fit {best['seconds']:.2f}s vs {full['seconds']:.2f}s ({saving:.0%} saved), "
+                f"{best['rows']} vs {full['rows']} rows, MAE {best['mae']:.0f} vs {full['mae']:.0f}."
+            )
+
+            if not options['dry_run']:
+                location.training_window = best['mode']
+                location.training_years = best['years']
+                location.save(update_fields=['training_window', 'training_years'])
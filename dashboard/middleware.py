@@ -0,0 +1,45 @@
+from django.conf import settings
+
+from dashboard.profiling import profile
+from dashboard.resilience import deadline, track_degraded
+
+
+class DeadlineMiddleware:
+    """Give each request one budget for all its upstream calls and flag degraded responses.
+
+    Responses built from last-known-good or default weather carry an
+    `X-WildCast-Degraded` header naming the upstreams that failed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with deadline(settings.REQUEST_DEADLINE_SECONDS), track_degraded() as degraded:
+            request.degraded = degraded
+            response = self.get_response(request)
+        if degraded:
+            response['X-WildCast-Degraded'] = ','.join(sorted(degraded))
+        return response
+
+
+class ProfilingMiddleware:
+    """Sample-profile a single request for staff who ask with `?profile=1` or an `X-WildCast-Profile` header.
+
+    The flag's value can name the output format (`collapsed` or `speedscope`).
+    The saved file name comes back in the `X-WildCast-Profile` response header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        flag = request.headers.get('X-WildCast-Profile') or request.GET.get('profile')
+        if not flag or not request.user.is_staff:
+            return self.get_response(request)
+
+        # Streamed bodies are produced after the view returns, so only the view is sampled
+        with profile(f"{request.method} {request.path}", flag) as saved:
+            response = self.get_response(request)
+        response['X-WildCast-Profile'] = saved['filename']
+        return response
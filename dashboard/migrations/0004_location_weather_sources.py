@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:04
+
+from django.db import migrations, models
+
+
+PARK_COORDINATES = {
+    'Safari Park': (33.0980, -116.9967, 150),
+    'San Diego Zoo': (32.7353, -117.1490, 90),
+}
+
+
+def set_park_coordinates(apps, schema_editor):
+    Location = apps.get_model('dashboard', 'Location')
+    for name, (lat, lon, elevation) in PARK_COORDINATES.items():
+        Location.objects.filter(name=name).update(latitude=lat, longitude=lon, elevation=elevation)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_remove_attendanceprediction_high_temp_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='elevation',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='forecast_gridpoint',
+            field=models.CharField(blank=True, db_index=True, max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='forecast_url',
+            field=models.URLField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='weather_station',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True),
+        ),
+        migrations.RunPython(set_park_coordinates, migrations.RunPython.noop),
+    ]
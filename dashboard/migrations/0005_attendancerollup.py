@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_location_weather_sources'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('source', models.CharField(choices=[('actual', 'Actual'), ('predicted', 'Predicted')], max_length=10)),
+                ('start', models.DateField()),
+                ('total', models.FloatField()),
+                ('mean', models.FloatField()),
+                ('minimum', models.FloatField()),
+                ('maximum', models.FloatField()),
+                ('count', models.IntegerField()),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dashboard.location')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('location', 'period', 'source', 'start'), name='unique_attendance_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_attendancerollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendanceprediction',
+            name='issued_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sevendayprediction',
+            name='issued_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='AccuracyAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('seven_day', '7-Day'), ('daily', 'Daily')], max_length=10)),
+                ('horizon', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('sum_error', models.FloatField(default=0)),
+                ('sum_abs_error', models.FloatField(default=0)),
+                ('sum_abs_pct_error', models.FloatField(default=0)),
+                ('pct_count', models.IntegerField(default=0)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dashboard.location')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('location', 'source', 'horizon'), name='unique_accuracy_aggregate')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AccuracyMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('source', models.CharField(choices=[('seven_day', '7-Day'), ('daily', 'Daily')], max_length=10)),
+                ('issued_on', models.DateField()),
+                ('horizon', models.IntegerField()),
+                ('predicted', models.FloatField()),
+                ('actual', models.FloatField()),
+                ('high_temp', models.FloatField(blank=True, null=True)),
+                ('precipitation', models.FloatField(blank=True, null=True)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dashboard.location')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('location', 'date', 'source', 'issued_on'), name='unique_accuracy_metric')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResidualBin',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('variable', models.CharField(choices=[('high_temp', 'High Temperature'), ('precipitation', 'Precipitation')], max_length=15)),
+                ('bin_start', models.FloatField()),
+                ('count', models.IntegerField(default=0)),
+                ('sum_residual', models.FloatField(default=0)),
+                ('sum_abs_residual', models.FloatField(default=0)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dashboard.location')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('location', 'variable', 'bin_start'), name='unique_residual_bin')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_accuracy_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='timezone',
+            field=models.CharField(default='America/Los_Angeles', max_length=50),
+        ),
+    ]
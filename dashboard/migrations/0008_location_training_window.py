@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0007_location_timezone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='training_window',
+            field=models.CharField(choices=[('full', 'Full history'), ('years', 'Last N years'), ('weighted', 'Recency weighted'), ('weekly', 'Weekly points before the last N years')], default='full', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='training_years',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
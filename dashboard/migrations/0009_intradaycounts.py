@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_location_training_window'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IntradayCounts',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('entrances', models.JSONField(default=list)),
+                ('counts', models.BinaryField()),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dashboard.location')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('location', 'date'), name='unique_intraday_counts')],
+            },
+        ),
+    ]
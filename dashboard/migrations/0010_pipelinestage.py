@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_intradaycounts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineStage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(max_length=20)),
+                ('inputs', models.JSONField(default=dict)),
+                ('output', models.CharField(max_length=64)),
+                ('ran_at', models.DateTimeField(auto_now=True)),
+                ('seconds', models.FloatField(default=0)),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='dashboard.location')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('location', 'stage'), name='unique_pipeline_stage')],
+            },
+        ),
+    ]
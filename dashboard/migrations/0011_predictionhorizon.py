@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_pipelinestage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PredictionHorizon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('daily', 'Daily'), ('seven_day', '7-Day')], max_length=10)),
+                ('issued_on', models.DateField()),
+                ('start', models.DateField()),
+                ('days', models.IntegerField()),
+                ('series', models.JSONField(default=list)),
+                ('values', models.BinaryField()),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dashboard.location')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('location', 'kind', 'issued_on'), name='unique_prediction_horizon')],
+            },
+        ),
+    ]
@@ -1,14 +1,41 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
 from django.db import models
 
 # Create your models here.
 
 class Location(models.Model):
+    TRAINING_WINDOW_CHOICES = [
+        ('full', 'Full history'),
+        ('years', 'Last N years'),
+        ('weighted', 'Recency weighted'),
+        ('weekly', 'Weekly points before the last N years'),
+    ]
+
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    elevation = models.FloatField(blank=True, null=True)
+    # Resolved upstream weather sources, shared by locations in the same grid cell
+    forecast_gridpoint = models.CharField(max_length=50, blank=True, null=True, db_index=True)
+    forecast_url = models.URLField(blank=True, null=True)
+    weather_station = models.CharField(max_length=20, blank=True, null=True, db_index=True)
+    timezone = models.CharField(max_length=50, default='America/Los_Angeles')
+    # How much history models train on (see dashboard/training.py); for 'weighted'
+    # training_years is the half-life of a day's weight
+    training_window = models.CharField(max_length=10, choices=TRAINING_WINDOW_CHOICES, default='full')
+    training_years = models.FloatField(blank=True, null=True)
 
     def __str__(self):
         return self.name
 
+    def local_now(self):
+        return datetime.now(ZoneInfo(self.timezone))
+
+    def local_today(self):
+        return self.local_now().date()
+
 class DailyAttendance(models.Model):
     date = models.DateField()
     location = models.ForeignKey(Location, on_delete=models.CASCADE)
@@ -20,6 +47,7 @@ class AttendancePrediction(models.Model):
     date = models.DateField()
     location = models.ForeignKey(Location, on_delete=models.CASCADE)
     value = models.FloatField()
+    issued_on = models.DateField(blank=True, null=True)
 
 
     def __str__(self):
@@ -31,6 +59,190 @@ class SevenDayPrediction(models.Model):
     value = models.FloatField()
     high_temp = models.FloatField(blank=True, null=True)
     precipitation = models.FloatField(blank=True, null=True)
+    # Each nightly run is kept as its own generation so accuracy can be tracked per horizon
+    issued_on = models.DateField(blank=True, null=True)
+
+    def __str__(self):
+        return f"7-Day Prediction for {self.date} at {self.location}: {self.value}"
+
+class PredictionSnapshot(models.Model):
+    """The last daily prediction for a date, kept once the date leaves the published window.
+
+    Publishing drops days before today from AttendancePrediction (or the packed
+    horizon), usually before that day's attendance is in, so the prediction is
+    kept here for accuracy scoring (see dashboard/accuracy.py).
+    """
+    location = models.ForeignKey(Location, on_delete=models.CASCADE)
+    date = models.DateField()
+    issued_on = models.DateField()
+    value = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'date'], name='unique_prediction_snapshot'),
+        ]
+
+    def __str__(self):
+        return f"Prediction snapshot for {self.date} at {self.location}: {self.value}"
+
+class AttendanceRollup(models.Model):
+    PERIOD_CHOICES = [('week', 'Week'), ('month', 'Month')]
+    SOURCE_CHOICES = [('actual', 'Actual'), ('predicted', 'Predicted')]
+
+    location = models.ForeignKey(Location, on_delete=models.CASCADE)
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    start = models.DateField()
+    total = models.FloatField()
+    mean = models.FloatField()
+    minimum = models.FloatField()
+    maximum = models.FloatField()
+    count = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'period', 'source', 'start'], name='unique_attendance_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_source_display()} {self.period} of {self.start} at {self.location}: {self.total}"
+
+
+class AccuracyMetric(models.Model):
+    SOURCE_CHOICES = [('seven_day', '7-Day'), ('daily', 'Daily')]
+
+    location = models.ForeignKey(Location, on_delete=models.CASCADE)
+    date = models.DateField()
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    issued_on = models.DateField()
+    horizon = models.IntegerField()
+    predicted = models.FloatField()
+    actual = models.FloatField()
+    # Observed weather on the day, for the residual-by-weather bins
+    high_temp = models.FloatField(blank=True, null=True)
+    precipitation = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'date', 'source', 'issued_on'], name='unique_accuracy_metric'),
+        ]
+
+    @property
+    def error(self):
+        return self.actual - self.predicted
+
+    def __str__(self):
+        return f"{self.horizon}-day {self.source} error for {self.date} at {self.location}: {self.error}"
+
+class AccuracyAggregate(models.Model):
+    location = models.ForeignKey(Location, on_delete=models.CASCADE)
+    source = models.CharField(max_length=10, choices=AccuracyMetric.SOURCE_CHOICES)
+    horizon = models.IntegerField()
+    count = models.IntegerField(default=0)
+    sum_error = models.FloatField(default=0)
+    sum_abs_error = models.FloatField(default=0)
+    sum_abs_pct_error = models.FloatField(default=0)
+    pct_count = models.IntegerField(default=0)  # Days with non-zero attendance, for MAPE
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'source', 'horizon'], name='unique_accuracy_aggregate'),
+        ]
+
+    @property
+    def mae(self):
+        return self.sum_abs_error / self.count if self.count else None
+
+    @property
+    def mape(self):
+        return self.sum_abs_pct_error / self.pct_count if self.pct_count else None
+
+    @property
+    def bias(self):
+        return self.sum_error / self.count if self.count else None
+
+class ResidualBin(models.Model):
+    VARIABLE_CHOICES = [('high_temp', 'High Temperature'), ('precipitation', 'Precipitation')]
+
+    location = models.ForeignKey(Location, on_delete=models.CASCADE)
+    variable = models.CharField(max_length=15, choices=VARIABLE_CHOICES)
+    bin_start = models.FloatField()
+    count = models.IntegerField(default=0)
+    sum_residual = models.FloatField(default=0)
+    sum_abs_residual = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'variable', 'bin_start'], name='unique_residual_bin'),
+        ]
+
+    @property
+    def mean_residual(self):
+        return self.sum_residual / self.count if self.count else None
+
+class IntradayCounts(models.Model):
+    """A location-day of turnstile counts packed into one row.
+
+    `counts` holds a little-endian uint32 array shaped (len(entrances), 96):
+    one fixed-width row of 15-minute buckets per entrance, in park local time.
+    See dashboard/intraday.py.
+    """
+    location = models.ForeignKey(Location, on_delete=models.CASCADE)
+    date = models.DateField()
+    entrances = models.JSONField(default=list)
+    counts = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'date'], name='unique_intraday_counts'),
+        ]
+
+    def __str__(self):
+        return f"Intraday counts for {self.date} at {self.location}"
+
+class PipelineStage(models.Model):
+    """The last successful run of a nightly pipeline stage (see dashboard/pipeline.py).
+
+    `inputs` maps each input's name to its fingerprint, so a later run can tell
+    which input changed. Stages that aren't per location have no location.
+    """
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, blank=True, null=True)
+    stage = models.CharField(max_length=20)
+    inputs = models.JSONField(default=dict)
+    output = models.CharField(max_length=64)
+    ran_at = models.DateTimeField(auto_now=True)
+    seconds = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'stage'], name='unique_pipeline_stage'),
+        ]
+
+    def __str__(self):
+        return f"{self.stage} stage for {self.location or 'all locations'}"
+
+class PredictionHorizon(models.Model):
+    """One location's prediction run packed into one row.
+
+    `values` holds a little-endian float32 array shaped (len(series), days):
+    one row per named series (yhat, bounds, forecast weather), one column per
+    day from `start`. Used instead of AttendancePrediction and SevenDayPrediction
+    rows when PREDICTION_STORAGE is 'packed'; see dashboard/horizons.py.
+    """
+    KIND_CHOICES = [('daily', 'Daily'), ('seven_day', '7-Day')]
+
+    location = models.ForeignKey(Location, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    issued_on = models.DateField()
+    start = models.DateField()
+    days = models.IntegerField()
+    series = models.JSONField(default=list)
+    values = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'kind', 'issued_on'], name='unique_prediction_horizon'),
+        ]
 
     def __str__(self):
-        return f"7-Day Prediction for {self.date} at {self.location}: {self.value}"
\ No newline at end of file
+        return f"{self.get_kind_display()} predictions issued {self.issued_on} at {self.location}"
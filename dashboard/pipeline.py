@@ -0,0 +1,246 @@
+import hashlib
+import json
+import time
+import traceback
+from functools import cached_property
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from dashboard.forecasting import get_fitted_model, get_history_signature
+from dashboard.global_model import get_global_model, get_global_signature
+from dashboard.horizons import has_predictions
+from dashboard.models import PipelineStage
+from dashboard.publishing import (
+    PREDICTION_REFRESH_TOLERANCE, get_forecast_locations, predict_attendance, predict_seven_day,
+    save_attendance_predictions, save_seven_day_predictions, seven_day_frame,
+)
+from dashboard.weather import get_default_location, get_forecasts_for_locations, get_weather_gov_forecast
+
+
+def fingerprint(value):
+    """Hash any JSON-able value (dates and other objects by their str) to a short hex string."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+class Stage:
+    """A pipeline step that only runs when the fingerprints of its inputs change.
+
+    `inputs(run, outputs)` returns a dict of named input values, where outputs
+    holds the output fingerprints of the earlier stages. `execute(run, inputs)`
+    does the work and returns the value fingerprinted as the stage's output.
+    `missing(run)` can give a reason to run although nothing changed, such as
+    the stage's result having been deleted since.
+    """
+
+    def __init__(self, name, inputs, execute, missing=None, always=False):
+        self.name = name
+        self.inputs = inputs
+        self.execute = execute
+        self.missing = missing
+        self.always = always
+
+
+class LocationRun:
+    """What the per-location stages work on, computed only when a stage needs it."""
+
+    def __init__(self, location, forecasts):
+        self.location = location
+        self.forecasts = forecasts
+        self.today = location.local_today()
+
+    @cached_property
+    def predictions(self):
+        """The next week's (forecast, weather) and the year-ahead forecast."""
+        seven_day, future = predict_seven_day(self.location, self.forecasts, self.today)
+        return seven_day, future, predict_attendance(self.location, self.today)
+
+
+def load_inputs(run, outputs):
+    # One aggregate query; the rows themselves are only read if fit has to run
+    return {'history': get_history_signature(run.location)}
+
+
+def load(run, inputs):
+    return inputs['history']
+
+
+def weather_inputs(run, outputs):
+    return {'today': run.today, 'gridpoint': run.location.forecast_gridpoint}
+
+
+def weather(run, inputs):
+    future = seven_day_frame(run.location, run.forecasts, run.today)
+    return future[['ds', 'high_temp', 'precipitation']].astype(str).values.tolist()
+
+
+def fit_inputs(run, outputs):
+    if settings.FORECAST_MODE == 'global':
+        # The shared model is fitted on every park, so new history anywhere refits it
+        return {'history': get_global_signature(), 'mode': 'global'}
+    return {'history': outputs['load'], 'mode': settings.FORECAST_MODE}
+
+
+def fit(run, inputs):
+    if settings.FORECAST_MODE == 'global':
+        get_global_model()
+    else:
+        get_fitted_model(run.location)
+        get_fitted_model(run.location, regressors=())
+    return inputs
+
+
+def predict_inputs(run, outputs):
+    return {'model': outputs['fit'], 'weather': outputs['weather'], 'today': run.today}
+
+
+def predict(run, inputs):
+    # Rounded so refits that move predictions by a fraction of a visitor don't republish
+    return [
+        [forecast['ds'].dt.date.tolist(), np.round(forecast['yhat'].to_numpy()).tolist()]
+        for forecast in (run.predictions[0], run.predictions[2])
+    ]
+
+
+def publish_inputs(run, outputs):
+    return {'predictions': outputs['predict']}
+
+
+def publish(run, inputs):
+    seven_day, future, attendance = run.predictions
+    save_seven_day_predictions(run.location, seven_day, future, run.today)
+    save_attendance_predictions(run.location, attendance, True, PREDICTION_REFRESH_TOLERANCE, run.today)
+    return inputs
+
+
+def unpublished(run):
+    if not has_predictions(run.location, 'seven_day', run.today):
+        return f"predictions for {run.today} not published"
+
+
+def render_inputs(run, outputs):
+    return {
+        'today': run.today,
+        'history': get_history_signature(run.location),
+        'mode': settings.FORECAST_MODE,
+        'weather': get_weather_gov_forecast(run.location),
+    }
+
+
+def render(run, inputs):
+    # Imported here as views runs django.setup() on import
+    from dashboard import views
+    views.get_homepage_context(run.today, refresh=True)
+    return inputs
+
+
+def unrendered(run):
+    if f"homepage:{run.today.isoformat()}" not in cache:
+        return f"homepage for {run.today} not cached"
+
+
+LOCATION_STAGES = [
+    Stage('load', load_inputs, load),
+    Stage('weather', weather_inputs, weather, always=True),
+    Stage('fit', fit_inputs, fit),
+    Stage('predict', predict_inputs, predict),
+    Stage('publish', publish_inputs, publish, missing=unpublished),
+]
+
+# The homepage is built from the default park's model
+RENDER_STAGE = Stage('render', render_inputs, render, missing=unrendered)
+
+
+class StageResult:
+    def __init__(self, location, stage, status, seconds, reason):
+        self.location = location
+        self.stage = stage
+        self.status = status
+        self.seconds = seconds
+        self.reason = reason
+
+    def __str__(self):
+        return (
+            f"{str(self.location or 'all locations'):<20} {self.stage:<8} {self.status:<8} "
+            f"{self.seconds:>7.2f}s  {self.reason}"
+        )
+
+
+def run_stage(stage, run, outputs, location=None, force=False):
+    """Run or skip one stage, recording its fingerprints. Returns (result, output fingerprint)."""
+    started = time.perf_counter()
+    inputs = stage.inputs(run, outputs)
+    input_prints = {name: fingerprint(value) for name, value in inputs.items()}
+    previous = PipelineStage.objects.filter(location=location, stage=stage.name).first()
+
+    if force:
+        reason = 'forced'
+    elif stage.always:
+        reason = 'always runs'
+    elif previous is None:
+        reason = 'first run'
+    elif previous.inputs != input_prints:
+        changed = sorted(name for name in input_prints if previous.inputs.get(name) != input_prints[name])
+        reason = f"changed: {', '.join(changed)}"
+    else:
+        reason = stage.missing(run) if stage.missing else None
+
+    if reason is None:
+        seconds = time.perf_counter() - started
+        return StageResult(location, stage.name, 'skipped', seconds,
+                           f"unchanged since {previous.ran_at:%Y-%m-%d %H:%M}"), previous.output
+
+    output = fingerprint(stage.execute(run, inputs))
+    seconds = time.perf_counter() - started
+    PipelineStage.objects.update_or_create(
+        location=location, stage=stage.name,
+        defaults={'inputs': input_prints, 'output': output, 'seconds': seconds},
+    )
+    return StageResult(location, stage.name, 'ran', seconds, reason), output
+
+
+def run_stages(stages, run, location=None, force=False, log=print):
+    """Run stages in order, stopping at the first failure. Returns the stage results."""
+    outputs = {}
+    results = []
+    for stage in stages:
+        try:
+            result, outputs[stage.name] = run_stage(stage, run, outputs, location, force)
+        except Exception as e:
+            log(traceback.format_exc())
+            results.append(StageResult(location, stage.name, 'failed', 0, str(e)))
+            break
+        results.append(result)
+        log(str(result))
+    return results
+
+
+def run_pipeline(force=False, render=True, log=print):
+    """Run the nightly pipeline for every location, skipping stages whose inputs are unchanged.
+
+    Returns the StageResult of every stage that was attempted.
+    """
+    started = time.perf_counter()
+    locations = get_forecast_locations()
+    if settings.FORECAST_MODE == 'global':
+        locations = get_global_model().trained_locations(locations)
+    # One Weather.gov request per gridpoint, however many parks share it
+    forecasts = get_forecasts_for_locations(locations)
+
+    results = []
+    for location in locations:
+        run = LocationRun(location, forecasts[location.pk])
+        results += run_stages(LOCATION_STAGES, run, location, force, log)
+
+    if render:
+        default = get_default_location()
+        results += run_stages([RENDER_STAGE], LocationRun(default, forecasts.get(default.pk)), None, force, log)
+
+    ran = [result for result in results if result.status == 'ran']
+    failed = [result for result in results if result.status == 'failed']
+    log(
+        f"Pipeline finished in {time.perf_counter() - started:.1f}s: {len(ran)} stages ran, "
+        f"{len(results) - len(ran) - len(failed)} skipped, {len(failed)} failed."
+    )
+    return results
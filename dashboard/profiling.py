@@ -0,0 +1,203 @@
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.conf import settings
+
+from dashboard.sqlite import get_busy_writer_thread
+
+PROFILE_FORMATS = {'collapsed': '.collapsed.txt', 'speedscope': '.speedscope.json'}
+
+
+class SamplingProfiler:
+    """Sample one thread's Python stack at a fixed interval from a background thread.
+
+    Writes handed to the batched writer run on its thread, so that thread is
+    sampled too while it is busy. Each stack is rooted at its thread's name.
+    Only the sampled threads' frames are walked, so the overhead is a few
+    microseconds per sample and nothing is traced in between.
+    """
+
+    def __init__(self, thread_id=None, interval=None):
+        self.thread_id = thread_id or threading.get_ident()
+        self.thread_name = next(
+            (thread.name for thread in threading.enumerate() if thread.ident == self.thread_id), 'thread'
+        )
+        self.interval = interval or settings.PROFILE_INTERVAL_SECONDS
+        self.stacks = Counter()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='sampling-profiler', daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            self.sample(self.thread_name, frames.get(self.thread_id))
+            writer = get_busy_writer_thread()
+            if writer is not None and writer.ident != self.thread_id:
+                self.sample(writer.name, frames.get(writer.ident))
+
+    def sample(self, thread_name, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        if stack:
+            stack.append((thread_name, '', 0))
+            # Root first, as both output formats expect
+            self.stacks[tuple(reversed(stack))] += 1
+
+
+def frame_label(name, filename, line):
+    """Name a frame by function and a short path, e.g. `fit (prophet/forecaster.py:1180)`."""
+    if not filename:
+        # A thread's root
+        return name.replace(';', ',')
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1:]
+            break
+    return f"{name} ({filename}:{line})".replace(';', ',')
+
+
+def to_collapsed(profiler):
+    """Render samples as collapsed stacks, one `frame;frame;frame count` line per stack."""
+    return ''.join(
+        ';'.join(frame_label(*frame) for frame in stack) + f" {count}\n"
+        for stack, count in profiler.stacks.most_common()
+    )
+
+
+def to_speedscope(profiler, name):
+    """Render samples as a speedscope sampled profile, weighted in seconds."""
+    frame_index = {}
+    samples = []
+    weights = []
+    for stack, count in profiler.stacks.items():
+        samples.append([frame_index.setdefault(frame, len(frame_index)) for frame in stack])
+        weights.append(count * profiler.interval)
+
+    return json.dumps({
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'wildcast',
+        'shared': {'frames': [
+            {'name': frame_label(*frame), 'file': frame[1], 'line': frame[2]} for frame in frame_index
+        ]},
+        'profiles': [{
+            'type': 'sampled', 'name': name, 'unit': 'seconds',
+            'startValue': 0, 'endValue': sum(weights),
+            'samples': samples, 'weights': weights,
+        }],
+    })
+
+
+def enforce_retention(keep=None):
+    """Delete the oldest profiles until the directory is under its size and count caps.
+
+    The `keep` profile (the one just saved) is never deleted, even when it is
+    over the size cap on its own.
+    """
+    profiles = list_profiles()
+    total = sum(profile['size'] for profile in profiles)
+    # list_profiles is newest first
+    evictable = [profile for profile in profiles if profile['name'] != keep]
+    count = len(profiles)
+    while evictable and (total > settings.PROFILE_MAX_BYTES or count > settings.PROFILE_MAX_FILES):
+        oldest = evictable.pop()
+        os.remove(os.path.join(settings.PROFILE_DIR, oldest['name']))
+        total -= oldest['size']
+        count -= 1
+
+
+def save_profile(profiler, name, fmt=None):
+    """Write a finished profile to the profile directory and return its file name."""
+    fmt = fmt if fmt in PROFILE_FORMATS else settings.PROFILE_FORMAT
+    slug = re.sub(r'[^A-Za-z0-9_-]+', '-', name).strip('-')[:60] or 'profile'
+    filename = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{slug}{PROFILE_FORMATS[fmt]}"
+
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    body = to_speedscope(profiler, name) if fmt == 'speedscope' else to_collapsed(profiler)
+    with open(os.path.join(settings.PROFILE_DIR, filename), 'w') as f:
+        f.write(body)
+
+    enforce_retention(keep=filename)
+    return filename
+
+
+@contextmanager
+def profile(name, fmt=None, enabled=True):
+    """Sample the current thread (and the database writer) for the duration of the block and save the result.
+
+    Yields a dict that holds the saved file name once the block exits.
+    """
+    result = {}
+    if not enabled:
+        yield result
+        return
+
+    profiler = SamplingProfiler().start()
+    try:
+        yield result
+    finally:
+        profiler.stop()
+        result['filename'] = save_profile(profiler, name, fmt)
+        print(f"Profile of {name} ({profiler.duration:.1f}s) saved to {result['filename']}")
+
+
+def profile_script(name):
+    """Profile a script from here until it exits when it was run with --profile[=format].
+
+    For scripts without an argument parser; ones with argparse should pass the
+    parsed format to profile_until_exit instead.
+    """
+    flags = [arg for arg in sys.argv[1:] if arg == '--profile' or arg.startswith('--profile=')]
+    if flags:
+        profile_until_exit(name, flags[0].partition('=')[2] or None)
+
+
+def profile_until_exit(name, fmt=None):
+    """Profile the current thread (and the database writer) from here until the process exits."""
+    profiler = SamplingProfiler().start()
+
+    def finish():
+        profiler.stop()
+        filename = save_profile(profiler, name, fmt)
+        print(f"Profile of {name} ({profiler.duration:.1f}s) saved to {filename}")
+
+    atexit.register(finish)
+
+
+def list_profiles():
+    """Get the saved profiles, newest first."""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+
+    profiles = []
+    for filename in os.listdir(settings.PROFILE_DIR):
+        if not filename.endswith(tuple(PROFILE_FORMATS.values())):
+            continue
+        stat = os.stat(os.path.join(settings.PROFILE_DIR, filename))
+        profiles.append({
+            'name': filename,
+            'size': stat.st_size,
+            'modified': datetime.fromtimestamp(stat.st_mtime),
+        })
+    return sorted(profiles, key=lambda profile: (profile['modified'], profile['name']), reverse=True)
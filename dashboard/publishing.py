@@ -0,0 +1,264 @@
+import pandas as pd
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+
+from dashboard.models import Location, AttendancePrediction, SevenDayPrediction
+from dashboard.forecasting import get_fitted_model
+from dashboard.features import add_calendar_features
+from dashboard.global_model import get_global_model
+from dashboard.horizons import get_horizon, is_packed, save_horizon, slice_horizon
+from dashboard.rollups import rebuild_rollups, refresh_rollups
+from dashboard.accuracy import snapshot_expiring_predictions
+
+# Predictions that moved by less than this many visitors are left untouched on refresh
+PREDICTION_REFRESH_TOLERANCE = 1.0
+
+def get_forecast_locations():
+    """Get every location that has attendance history to forecast from."""
+    return list(Location.objects.filter(dailyattendance__isnull=False).distinct())
+
+
+def get_forecast_weather(dates, weather_forecasts):
+    """Get the forecast high temperature and precipitation for each date."""
+    forecasts_by_date = {f['date']: f for f in weather_forecasts or []}
+    temperatures = []
+    precipitation = []
+    for d in dates:
+        # Fallback to default values when Weather.gov has nothing for the date
+        weather = forecasts_by_date.get(d, {'temperature': 75.0, 'precipitation': 0.0})
+        temperatures.append(weather['temperature'])
+        precipitation.append(weather['precipitation'])
+    return temperatures, precipitation
+
+def make_weather_predictions_for_location(location, weather_forecasts, today=None):
+    if settings.FORECAST_MODE == 'global':
+        return make_global_weather_predictions([location], {location.pk: weather_forecasts}, today)
+
+    today = today or location.local_today()
+    forecast, future = predict_seven_day(location, weather_forecasts, today)
+    save_seven_day_predictions(location, forecast, future, today)
+
+def seven_day_frame(location, weather_forecasts, today):
+    """Get the next week's dates and forecast weather for a location."""
+    dates = [today + timedelta(days=i) for i in range(0, 7)]
+    temperatures, precipitation = get_forecast_weather(dates, weather_forecasts)
+    return pd.DataFrame({
+        'location_id': location.pk, 'ds': pd.to_datetime(dates),
+        'high_temp': temperatures, 'precipitation': precipitation,
+    })
+
+def predict_seven_day(location, weather_forecasts, today):
+    """Predict a location's next week from its weather forecast. Returns (forecast, future)."""
+    future = seven_day_frame(location, weather_forecasts, today)
+    if settings.FORECAST_MODE == 'global':
+        return get_global_model().predict(future), future
+
+    future['floor'] = 0
+    forecast = get_fitted_model(location).predict(add_calendar_features(future.drop(columns='location_id')))
+    return forecast, future
+
+def make_global_weather_predictions(locations, forecasts_by_location, today=None):
+    """Predict the next week for every location with one call to the global model."""
+    locations = get_global_model().trained_locations(locations)
+    if not locations:
+        return
+    future = pd.concat([
+        seven_day_frame(location, forecasts_by_location[location.pk], today or location.local_today())
+        for location in locations
+    ], ignore_index=True)
+
+    forecast = get_global_model().predict(future)
+    for location in locations:
+        rows = (future['location_id'] == location.pk).to_numpy()
+        save_seven_day_predictions(
+            location, forecast[rows].reset_index(drop=True), future[rows].reset_index(drop=True),
+            today or location.local_today(),
+        )
+
+def save_seven_day_predictions(location, forecast, future, issued_on):
+    if is_packed():
+        save_horizon(location, 'seven_day', issued_on, forecast, future)
+        print(f"7-Day predictions created successfully for {location}.")
+        return
+
+    # Earlier generations are kept for accuracy tracking; only replace today's
+    SevenDayPrediction.objects.filter(location=location, issued_on=issued_on).delete()
+    for i in range(len(forecast)):
+        SevenDayPrediction.objects.create(
+            date=forecast['ds'].iloc[i],
+            location=location,
+            value=forecast['yhat'].iloc[i],
+            high_temp=future['high_temp'].iloc[i],
+            precipitation=future['precipitation'].iloc[i],
+            issued_on=issued_on
+        )
+    print(f"7-Day predictions created successfully for {location}.")
+    
+def make_attendance_predictions_for_location(location, refresh=False, tolerance=PREDICTION_REFRESH_TOLERANCE, today=None):
+    if settings.FORECAST_MODE == 'global':
+        return make_global_attendance_predictions([location], refresh, tolerance, today).get(location.pk)
+
+    today = today or location.local_today()
+    forecast = predict_attendance(location, today)
+    return save_attendance_predictions(location, forecast, refresh, tolerance, today)
+
+def attendance_frame(location, today, model=None):
+    """Get the next year's dates for a location, with the global model's average weather."""
+    future = pd.DataFrame({'location_id': location.pk, 'ds': pd.date_range(today, periods=365, freq='D')})
+    if model is not None:
+        future['high_temp'], future['precipitation'] = model.climatology()
+    return future
+
+def predict_attendance(location, today):
+    """Predict a location's attendance for the next year without weather."""
+    if settings.FORECAST_MODE == 'global':
+        model = get_global_model()
+        return model.predict(attendance_frame(location, today, model))
+
+    future = attendance_frame(location, today).drop(columns='location_id')
+    future['floor'] = 0
+    return get_fitted_model(location, regressors=()).predict(add_calendar_features(future))
+
+def make_global_attendance_predictions(locations, refresh=False, tolerance=PREDICTION_REFRESH_TOLERANCE, today=None):
+    """Predict the next year for every location with one call to the global model.
+
+    There is no weather forecast that far out, so every day gets the average
+    training weather. Returns the result of saving each location's predictions,
+    leaving out locations the model has no training rows for.
+    """
+    model = get_global_model()
+    locations = model.trained_locations(locations)
+    if not locations:
+        return {}
+    future = pd.concat([
+        attendance_frame(location, today or location.local_today(), model) for location in locations
+    ], ignore_index=True)
+    forecast = model.predict(future)
+
+    return {
+        location.pk: save_attendance_predictions(
+            location,
+            forecast[forecast['location_id'] == location.pk].reset_index(drop=True),
+            refresh, tolerance, today or location.local_today(),
+        )
+        for location in locations
+    }
+
+def save_attendance_predictions(location, forecast, refresh, tolerance, today):
+    # Days about to drop out of the window may not have their attendance in yet
+    snapshot_expiring_predictions(location.pk, forecast['ds'].min().date())
+    if is_packed():
+        return save_packed_attendance_predictions(location, forecast, refresh, tolerance, today)
+    if refresh:
+        return refresh_attendance_predictions(location, forecast, tolerance, today)
+
+    AttendancePrediction.objects.filter(location=location).delete()
+    for i in range(len(forecast)):
+        AttendancePrediction.objects.create(
+            date=forecast['ds'].iloc[i],
+            location=location,
+            value=forecast['yhat'].iloc[i],
+            issued_on=today
+        )
+    rebuild_rollups(location.pk, 'predicted')
+
+def refresh_attendance_predictions(location, forecast, tolerance=PREDICTION_REFRESH_TOLERANCE, today=None):
+    """Diff a new forecast against the stored predictions and write only what changed.
+
+    Dates that fell out of the forecast window are deleted, new tail dates are
+    inserted and existing rows are updated only when their value moved by more
+    than `tolerance` visitors. Returns the number of rows touched per operation.
+    """
+    issued_on = today or location.local_today()
+    new_values = {
+        ds.date(): float(yhat)
+        for ds, yhat in zip(forecast['ds'], forecast['yhat'])
+    }
+
+    with transaction.atomic():
+        existing = {
+            prediction.date: prediction
+            for prediction in AttendancePrediction.objects.filter(location=location)
+        }
+
+        # Drop expired past dates (and anything else outside the new window)
+        expired = [d for d in existing if d not in new_values]
+        deleted = 0
+        if expired:
+            deleted, _ = AttendancePrediction.objects.filter(
+                location=location, date__in=expired
+            ).delete()
+
+        # Append dates that are new to the window
+        created = AttendancePrediction.objects.bulk_create([
+            AttendancePrediction(date=d, location=location, value=value, issued_on=issued_on)
+            for d, value in new_values.items()
+            if d not in existing
+        ])
+
+        # Only rewrite rows whose value moved beyond the tolerance
+        changed = []
+        for d, value in new_values.items():
+            prediction = existing.get(d)
+            if prediction is not None and abs(prediction.value - value) > tolerance:
+                prediction.value = value
+                prediction.issued_on = issued_on
+                changed.append(prediction)
+        if changed:
+            AttendancePrediction.objects.bulk_update(changed, ['value', 'issued_on'])
+
+        refresh_rollups(
+            location.pk,
+            expired + [p.date for p in created] + [p.date for p in changed],
+            'predicted'
+        )
+
+    touched = {'created': len(created), 'updated': len(changed), 'deleted': deleted}
+    print(
+        f"Attendance predictions refreshed for {location}: "
+        f"{touched['created']} created, {touched['updated']} updated, "
+        f"{touched['deleted']} deleted, "
+        f"{len(new_values) - len(created) - len(changed)} unchanged."
+    )
+    return touched
+
+def save_packed_attendance_predictions(location, forecast, refresh, tolerance, today):
+    """Store a year-ahead forecast as one packed row, replacing the previous one.
+
+    On refresh, days that moved by no more than `tolerance` visitors keep their
+    stored value and only the rollups of days that changed are recomputed, as
+    refresh_attendance_predictions does for rows. Returns the same counts.
+    """
+    forecast = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+    with transaction.atomic():
+        previous = get_horizon(location, 'daily') if refresh else None
+        stored = {}
+        if previous is not None:
+            days = slice_horizon(previous)
+            stored = {d: float(value) for d, value in zip(days['dates'], days['yhat']) if pd.notna(value)}
+
+        dates = [ds.date() for ds in forecast['ds']]
+        kept = {
+            i for i, (d, value) in enumerate(zip(dates, forecast['yhat']))
+            if d in stored and abs(stored[d] - value) <= tolerance
+        }
+        forecast.loc[forecast.index[sorted(kept)], 'yhat'] = [stored[dates[i]] for i in sorted(kept)]
+        save_horizon(location, 'daily', today, forecast)
+
+        if not refresh:
+            rebuild_rollups(location.pk, 'predicted')
+            return
+
+        expired = sorted(set(stored) - set(dates))
+        created = [d for d in dates if d not in stored]
+        changed = [d for i, d in enumerate(dates) if d in stored and i not in kept]
+        refresh_rollups(location.pk, expired + created + changed, 'predicted')
+
+    touched = {'created': len(created), 'updated': len(changed), 'deleted': len(expired)}
+    print(
+        f"Attendance predictions refreshed for {location}: "
+        f"{touched['created']} created, {touched['updated']} updated, "
+        f"{touched['deleted']} deleted, {len(kept)} unchanged."
+    )
+    return touched
@@ -0,0 +1,176 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+from django.conf import settings
+
+# Monotonic time by which upstream calls in the current request must finish
+_deadline = ContextVar('deadline', default=None)
+# Sets collecting the reasons a response is degraded, innermost last
+_degraded = ContextVar('degraded', default=())
+
+# Blocking client libraries (meteostat) run here so the caller can stop waiting
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='upstream')
+
+
+class UpstreamUnavailable(Exception):
+    """An upstream call was skipped or abandoned."""
+
+
+class DeadlineExceeded(UpstreamUnavailable):
+    """The request ran out of budget before the upstream had its full timeout."""
+
+
+class UpstreamTimeout(UpstreamUnavailable):
+    """The upstream didn't answer within its own per-call timeout."""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+
+@contextmanager
+def deadline(seconds):
+    """Give every upstream call inside the block a shared budget of `seconds`.
+
+    A nested deadline never extends the outer one.
+    """
+    expires = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        expires = min(expires, outer)
+    token = _deadline.set(expires)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """Get the seconds left in the current deadline, or None when there isn't one."""
+    expires = _deadline.get()
+    if expires is None:
+        return None
+    left = expires - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded('request deadline exceeded')
+    return left
+
+
+def request_timeout():
+    """Get a per-call (connect, read) timeout for requests, capped by the current deadline.
+
+    Returns (timeout, capped), where capped says the request budget shortened it.
+    """
+    connect, read = settings.UPSTREAM_CONNECT_TIMEOUT, settings.UPSTREAM_READ_TIMEOUT
+    left = remaining()
+    if left is None or left >= read:
+        return (connect, read), False
+    return (min(connect, left), left), True
+
+
+def call_with_deadline(fn, *args, timeout=None, **kwargs):
+    """Run a blocking call in a worker thread and stop waiting when its timeout or the budget runs out.
+
+    The call itself can't be interrupted, but the request is freed to fall back.
+    Raises UpstreamTimeout when the call had its full timeout and
+    DeadlineExceeded when the request budget cut it short.
+    """
+    timeout = timeout or settings.UPSTREAM_READ_TIMEOUT
+    left = remaining()
+    capped = left is not None and left < timeout
+    if capped:
+        timeout = left
+
+    future = _executor.submit(copy_context().run, fn, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        error = DeadlineExceeded if capped else UpstreamTimeout
+        raise error(f"{getattr(fn, '__name__', fn)} took longer than {timeout:.1f}s")
+
+
+class CircuitBreaker:
+    """Stop calling an upstream after repeated failures, then retry one call after a pause.
+
+    Closed: calls go through. Open: calls fail straight away with CircuitOpenError
+    until `reset_seconds` pass. Half-open: a single trial call decides whether
+    to close again or stay open. State is per process. A call abandoned because
+    the request ran out of budget (DeadlineExceeded) says nothing about the
+    upstream and isn't counted either way.
+    """
+
+    def __init__(self, name, failure_threshold=None, reset_seconds=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_BREAKER_FAILURES
+        self.reset_seconds = reset_seconds or settings.CIRCUIT_BREAKER_RESET_SECONDS
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        with self.lock:
+            state = self.state
+            if state == 'open' or (state == 'half-open' and self.trial_running):
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            if state == 'half-open':
+                self.trial_running = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                print(f"{self.name} circuit opened after {self.failures} failures")
+
+    def release_trial(self):
+        with self.lock:
+            self.trial_running = False
+
+    def call(self, fn, *args, **kwargs):
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except DeadlineExceeded:
+            self.release_trial()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+@contextmanager
+def track_degraded():
+    """Collect the upstreams that fell back to stale or default data inside the block."""
+    reasons = set()
+    token = _degraded.set(_degraded.get() + (reasons,))
+    try:
+        yield reasons
+    finally:
+        _degraded.reset(token)
+
+
+def mark_degraded(reason):
+    """Note that the current response is using fallback data because of `reason`."""
+    for reasons in _degraded.get():
+        reasons.add(reason)
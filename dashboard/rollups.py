@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+from dashboard.horizons import prediction_values
+from dashboard.models import AttendancePrediction, AttendanceRollup, DailyAttendance
+
+PERIODS = ('week', 'month')
+
+# Where each rollup source reads its daily values from
+SOURCES = {
+    'actual': (DailyAttendance, 'count'),
+    'predicted': (AttendancePrediction, 'value'),
+}
+
+
+def period_start(d, period):
+    """Get the first day of the week (Monday) or month containing a date."""
+    if period == 'week':
+        return d - timedelta(days=d.weekday())
+    return d.replace(day=1)
+
+
+def period_end(start, period):
+    """Get the first day of the following week or month."""
+    if period == 'week':
+        return start + timedelta(days=7)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def previous_year_start(start, period):
+    """Get the matching bucket one year earlier (52 weeks earlier for weeks)."""
+    if period == 'week':
+        return start - timedelta(weeks=52)
+    return start.replace(year=start.year - 1)
+
+
+def daily_values(location_id, source, start=None, end=None):
+    """Get a source's (date, value) pairs for a location in [start, end)."""
+    if source == 'predicted':
+        # Read through horizons as predictions may be stored packed
+        return prediction_values('daily', ['date', 'value'], location_id=location_id, start=start, end=end)
+
+    model, field = SOURCES[source]
+    rows = model.objects.filter(location_id=location_id)
+    if start is not None:
+        rows = rows.filter(date__gte=start)
+    if end is not None:
+        rows = rows.filter(date__lt=end)
+    return rows.values_list('date', field)
+
+
+def refresh_rollups(location_id, dates, source='actual'):
+    """Recompute the weekly and monthly buckets that cover the given dates.
+
+    Only the affected buckets are read and rewritten, so an insert or update
+    costs O(days in a month) rather than a scan of the whole history.
+    """
+    dates = set(dates)
+    if not dates:
+        return
+
+    for period in PERIODS:
+        starts = {period_start(d, period) for d in dates}
+        first, last = min(starts), period_end(max(starts), period)
+
+        values = {start: [] for start in starts}
+        for d, value in daily_values(location_id, source, first, last):
+            bucket = values.get(period_start(d, period))
+            if bucket is not None:
+                bucket.append(float(value))
+
+        AttendanceRollup.objects.bulk_create([
+            AttendanceRollup(
+                location_id=location_id, period=period, source=source, start=start,
+                total=sum(bucket), mean=sum(bucket) / len(bucket),
+                minimum=min(bucket), maximum=max(bucket), count=len(bucket),
+            )
+            for start, bucket in values.items()
+            if bucket
+        ], update_conflicts=True,
+            unique_fields=['location', 'period', 'source', 'start'],
+            update_fields=['total', 'mean', 'minimum', 'maximum', 'count'])
+
+        empty = [start for start, bucket in values.items() if not bucket]
+        if empty:
+            AttendanceRollup.objects.filter(
+                location_id=location_id, period=period, source=source, start__in=empty
+            ).delete()
+
+
+def rebuild_rollups(location_id, source='actual'):
+    """Rebuild every bucket for a location and source from the daily rows."""
+    AttendanceRollup.objects.filter(location_id=location_id, source=source).delete()
+    refresh_rollups(location_id, [d for d, _ in daily_values(location_id, source)], source)
+
+
+def get_rollups(location, period, start, end, source='actual'):
+    """Get the buckets starting in [start, end] with the year-earlier bucket alongside."""
+    rollups = list(AttendanceRollup.objects.filter(
+        location=location, period=period, source=source, start__gte=start, start__lte=end,
+    ).order_by('start'))
+
+    previous = {
+        rollup.start: rollup
+        for rollup in AttendanceRollup.objects.filter(
+            location=location, period=period, source='actual',
+            start__gte=previous_year_start(period_start(start, period), period),
+            start__lte=previous_year_start(period_start(end, period), period),
+        )
+    }
+
+    results = []
+    for rollup in rollups:
+        last_year = previous.get(previous_year_start(rollup.start, period))
+        results.append({
+            'start': rollup.start.isoformat(),
+            'total': rollup.total,
+            'mean': rollup.mean,
+            'min': rollup.minimum,
+            'max': rollup.maximum,
+            'count': rollup.count,
+            'previous_year_total': last_year.total if last_year else None,
+            'previous_year_mean': last_year.mean if last_year else None,
+        })
+    return results
@@ -0,0 +1,160 @@
+import time
+import traceback
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from dashboard.models import Location
+from dashboard.forecasting import get_fitted_model
+from dashboard.global_model import get_global_model
+from dashboard.publishing import (
+    make_attendance_predictions_for_location, make_weather_predictions_for_location,
+)
+from dashboard.weather import get_default_location, get_forecasts_for_locations
+
+
+class CronEntry:
+    """A five-field cron expression: minute hour day-of-month month day-of-week.
+
+    Fields accept `*`, numbers, ranges (`1-5`), lists (`0,30`) and steps (`*/15`).
+    Day-of-week runs 0-7 from Sunday, with 7 also Sunday. As in standard cron,
+    when both day-of-month and day-of-week are restricted (don't start with
+    `*`), a day matching either one matches.
+    """
+
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression '{expression}' needs 5 fields")
+        self.expression = expression
+        self.fields = [self.parse_field(field, low, high) for field, (low, high) in zip(fields, self.RANGES)]
+        # 7 is Sunday too
+        if 7 in self.fields[4]:
+            self.fields[4] = (self.fields[4] - {7}) | {0}
+        self.day_restricted = not fields[2].startswith('*')
+        self.weekday_restricted = not fields[4].startswith('*')
+
+    @staticmethod
+    def parse_field(field, low, high):
+        values = set()
+        for part in field.split(','):
+            part, _, step = part.partition('/')
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(v) for v in part.split('-'))
+            else:
+                start = end = int(part)
+            if start < low or end > high or start > end:
+                raise ValueError(f"cron field '{field}' is outside {low}-{high}")
+            if int(step or 1) < 1:
+                raise ValueError(f"cron field '{field}' has a step below 1")
+            values.update(range(start, end + 1, int(step or 1)))
+        return values
+
+    def matches(self, dt):
+        minute, hour, day, month, weekday = self.fields
+        day_matches = dt.day in day
+        weekday_matches = (dt.weekday() + 1) % 7 in weekday
+        if self.day_restricted and self.weekday_restricted:
+            day_matches = weekday_matches = day_matches or weekday_matches
+        return (
+            dt.minute in minute and dt.hour in hour and dt.month in month
+            and day_matches and weekday_matches
+        )
+
+
+class ScheduledJob:
+    """A callable run whenever its cron entry matches the time in its timezone."""
+
+    def __init__(self, name, cron, fn, timezone='UTC'):
+        self.name = name
+        self.cron = CronEntry(cron)
+        self.fn = fn
+        self.timezone = ZoneInfo(timezone)
+
+    def is_due(self, now):
+        return self.cron.matches(now.astimezone(self.timezone))
+
+    def __str__(self):
+        return f"{self.name} [{self.cron.expression} {self.timezone}]"
+
+
+def prewarm_rollover(location_id):
+    """Get everything a location needs for tomorrow ready before its local midnight."""
+    # Imported here as views runs django.setup() on import
+    from dashboard import views
+
+    location = Location.objects.get(pk=location_id)
+    tomorrow = location.local_today() + timedelta(days=1)
+
+    forecasts = get_forecasts_for_locations([location])[location.pk]
+    if location.dailyattendance_set.exists():
+        if settings.FORECAST_MODE == 'global':
+            get_global_model()
+        else:
+            get_fitted_model(location)
+        make_weather_predictions_for_location(location, forecasts, today=tomorrow)
+        make_attendance_predictions_for_location(location, refresh=True, today=tomorrow)
+
+    # The homepage and its plot are only shown for the default park
+    if location.pk == get_default_location().pk:
+        views.get_homepage_context(tomorrow, refresh=True)
+
+
+def refresh_todays_caches():
+    """Recompute today's homepage so it picks up newer Weather.gov forecasts."""
+    from dashboard import views
+
+    views.get_homepage_context(refresh=True)
+
+
+def build_schedule():
+    """Get the scheduled jobs: a rollover per location plus the daytime refresh."""
+    jobs = [
+        ScheduledJob(
+            f"rollover:{location.name}", settings.SCHEDULER_ROLLOVER_CRON,
+            lambda location_id=location.pk: prewarm_rollover(location_id), location.timezone,
+        )
+        for location in Location.objects.all()
+    ]
+    jobs.append(ScheduledJob(
+        'refresh-today', settings.SCHEDULER_REFRESH_CRON, refresh_todays_caches,
+        get_default_location().timezone,
+    ))
+    return jobs
+
+
+def run_job(job, log=print):
+    started = time.perf_counter()
+    try:
+        close_old_connections()
+        job.fn()
+        log(f"{job.name} finished in {time.perf_counter() - started:.1f}s")
+    except Exception:
+        log(f"{job.name} failed:\n{traceback.format_exc()}")
+    finally:
+        close_old_connections()
+
+
+def run_scheduler(jobs, log=print, stop=None):
+    """Run due jobs at the top of every minute until `stop()` returns True.
+
+    Minutes that passed while a long job was running are caught up afterwards,
+    so a slow rollover never makes another location miss its slot.
+    """
+    checked = datetime.now(ZoneInfo('UTC')).replace(second=0, microsecond=0) - timedelta(minutes=1)
+    while not (stop and stop()):
+        now = datetime.now(ZoneInfo('UTC')).replace(second=0, microsecond=0)
+        while checked < now:
+            checked += timedelta(minutes=1)
+            for job in jobs:
+                if job.is_due(checked):
+                    run_job(job, log)
+
+        next_minute = checked + timedelta(minutes=1)
+        time.sleep(max(0, (next_minute - datetime.now(ZoneInfo('UTC'))).total_seconds()))
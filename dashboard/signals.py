@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from dashboard.accuracy import record_actuals
+from dashboard.models import DailyAttendance
+from dashboard.rollups import refresh_rollups
+from dashboard.sqlite import apply_sqlite_pragmas
+
+
+@receiver(post_save, sender=DailyAttendance)
+@receiver(post_delete, sender=DailyAttendance)
+def update_attendance_rollups(sender, instance, **kwargs):
+    """Keep the weekly/monthly rollups in step with single-row attendance edits."""
+    refresh_rollups(instance.location_id, [instance.date], 'actual')
+
+
+@receiver(post_save, sender=DailyAttendance)
+@receiver(post_delete, sender=DailyAttendance)
+def update_forecast_accuracy(sender, instance, **kwargs):
+    """Score the predictions that covered a day as soon as its actual attendance lands."""
+    record_actuals(instance.location_id, [instance.date])
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Switch new SQLite connections to WAL, a busy timeout and synchronous=NORMAL."""
+    if connection.vendor == 'sqlite' and settings.SQLITE_CONCURRENT_MODE:
+        with connection.cursor() as cursor:
+            apply_sqlite_pragmas(cursor)
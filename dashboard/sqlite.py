@@ -0,0 +1,104 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import connection, transaction
+
+# Applied to every new SQLite connection in concurrent mode
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # Readers don't block on the writer and vice versa
+    'synchronous': 'NORMAL',  # Safe with WAL, and avoids an fsync per commit
+    'busy_timeout': 20000,  # Wait (ms) for the write lock instead of failing
+}
+
+
+def apply_sqlite_pragmas(cursor):
+    """Put a SQLite connection into the concurrent operating mode."""
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+class BatchedWriter:
+    """Run database writes from every thread in the process on one writer thread.
+
+    Jobs that arrive close together are committed in a single transaction, each
+    in its own savepoint so one failing job doesn't roll back the others.
+    """
+
+    def __init__(self, max_batch=100, max_delay=0.01):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._jobs = queue.Queue()
+        # Set while a batch is being written, so profilers can skip the idle waits
+        self.busy = False
+        self._thread = threading.Thread(target=self._run, name='wildcast-db-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue a write and return a Future for its result."""
+        future = Future()
+        self._jobs.put((future, fn, args, kwargs))
+        return future
+
+    def _next_batch(self):
+        batch = [self._jobs.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._jobs.get(timeout=self.max_delay))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            self.busy = True
+            results = []
+            try:
+                with transaction.atomic():
+                    for future, fn, args, kwargs in batch:
+                        try:
+                            with transaction.atomic():
+                                results.append((future, fn(*args, **kwargs), None))
+                        except Exception as e:
+                            results.append((future, None, e))
+            except Exception as e:
+                # The commit itself failed, so none of the batch was written
+                results = [(future, None, e) for future, _, _, _ in batch]
+                connection.close()
+
+            self.busy = False
+            for future, result, error in results:
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Get the process-wide batched writer, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = BatchedWriter()
+        return _writer
+
+
+def get_busy_writer_thread():
+    """Get the writer thread while it is writing a batch, or None."""
+    if _writer is not None and _writer.busy:
+        return _writer._thread
+    return None
+
+
+def write(fn, *args, **kwargs):
+    """Run a write through the batched writer in concurrent mode, inline otherwise."""
+    if not settings.SQLITE_CONCURRENT_MODE:
+        with transaction.atomic():
+            return fn(*args, **kwargs)
+    return get_writer().submit(fn, *args, **kwargs).result()
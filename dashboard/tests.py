@@ -1,3 +1,198 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from dashboard.accuracy import record_actuals, snapshot_expiring_predictions
+from dashboard.horizons import build_horizon, get_horizon, slice_horizon, to_floats, unpack_values
+from dashboard.intraday import BUCKETS_PER_DAY, bucket_readings, ingest_gate_counts, unpack_counts
+from dashboard.models import (
+    AccuracyAggregate, AttendancePrediction, DailyAttendance, IntradayCounts, Location, SevenDayPrediction,
+)
+from dashboard.publishing import refresh_attendance_predictions, save_packed_attendance_predictions
+from dashboard.scheduler import CronEntry
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class CronEntryTests(SimpleTestCase):
+    def test_steps_and_lists(self):
+        cron = CronEntry('*/15 8,20 * * *')
+        self.assertTrue(cron.matches(datetime(2024, 5, 1, 8, 30)))
+        self.assertTrue(cron.matches(datetime(2024, 5, 1, 20, 0)))
+        self.assertFalse(cron.matches(datetime(2024, 5, 1, 8, 31)))
+        self.assertFalse(cron.matches(datetime(2024, 5, 1, 9, 0)))
+
+    def test_weekday_only(self):
+        # 2024-05-06 is a Monday, 2024-05-04 a Saturday
+        cron = CronEntry('0 9 * * 1-5')
+        self.assertTrue(cron.matches(datetime(2024, 5, 6, 9, 0)))
+        self.assertFalse(cron.matches(datetime(2024, 5, 4, 9, 0)))
+
+    def test_day_of_month_or_day_of_week(self):
+        cron = CronEntry('0 9 1 * 1')
+        self.assertTrue(cron.matches(datetime(2024, 5, 6, 9, 0)))  # A Monday, not the 1st
+        self.assertTrue(cron.matches(datetime(2024, 5, 1, 9, 0)))  # The 1st, a Wednesday
+        self.assertFalse(cron.matches(datetime(2024, 5, 7, 9, 0)))
+
+    def test_seven_is_sunday(self):
+        cron = CronEntry('0 0 * * 7')
+        self.assertTrue(cron.matches(datetime(2024, 5, 5, 0, 0)))
+        self.assertFalse(cron.matches(datetime(2024, 5, 6, 0, 0)))
+
+    def test_invalid_expressions(self):
+        for expression in ('* * * *', '60 * * * *', '5-1 * * * *', '*/0 * * * *', '0 0 * * 8'):
+            with self.assertRaises(ValueError, msg=expression):
+                CronEntry(expression)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class IngestGateCountsTests(TestCase):
+    def setUp(self):
+        self.location = Location.objects.create(name='Test Park', timezone='America/Los_Angeles')
+        # Every 5 minutes from 9:00 to 9:55 at two entrances, so three readings per bucket
+        start = datetime(2024, 5, 1, 9, 0)
+        self.readings = pd.DataFrame([
+            {'timestamp': f"{start + timedelta(minutes=5 * i):%Y-%m-%d %H:%M}", 'entrance': entrance, 'count': i + 1}
+            for i in range(12)
+            for entrance in ('north', 'south')
+        ])
+
+    def ingest(self, chunk_size):
+        seen = set()
+        for first in range(0, len(self.readings), chunk_size):
+            chunk = self.readings.iloc[first:first + chunk_size]
+            ingest_gate_counts(self.location, bucket_readings(self.location, chunk), seen)
+        row = IntradayCounts.objects.get(location=self.location, date=date(2024, 5, 1))
+        return dict(zip(row.entrances, unpack_counts(row)))
+
+    def test_sub_bucket_readings_are_summed(self):
+        counts = self.ingest(len(self.readings))
+        self.assertEqual(counts['north'].shape, (BUCKETS_PER_DAY,))
+        # 9:00-9:10 is readings 1-3, 9:15-9:25 is 4-6 and so on
+        self.assertEqual(counts['north'][36:40].tolist(), [6, 15, 24, 33])
+        self.assertEqual(counts['south'].sum(), sum(range(1, 13)))
+
+    def test_chunks_add_up_and_reingest_is_idempotent(self):
+        whole = self.ingest(len(self.readings))
+        # Chunks of 5 and 7 split buckets' readings between chunks, and each load re-sends the file
+        for chunk_size in (5, 7):
+            chunked = self.ingest(chunk_size)
+            for entrance in whole:
+                np.testing.assert_array_equal(chunked[entrance], whole[entrance])
+
+    def test_negative_counts_are_rejected(self):
+        self.readings.loc[3, 'count'] = -1
+        with self.assertRaises(ValueError):
+            bucket_readings(self.location, self.readings)
+
+
+class HorizonTests(SimpleTestCase):
+    def setUp(self):
+        self.location = Location(name='Test Park')
+        # 2024-05-03 is missing from the forecast
+        forecast = pd.DataFrame({
+            'ds': pd.to_datetime(['2024-05-01', '2024-05-02', '2024-05-04']),
+            'yhat': [100.5, 200.25, 400.0],
+        })
+        future = forecast.assign(high_temp=[70.0, 71.0, 73.0], precipitation=[0.0, 1.5, 0.0])
+        self.horizon = build_horizon(self.location, 'seven_day', date(2024, 5, 1), forecast, future)
+
+    def test_pack_round_trip(self):
+        self.assertEqual(self.horizon.start, date(2024, 5, 1))
+        self.assertEqual(self.horizon.days, 4)
+        self.assertEqual(self.horizon.series, ['yhat', 'high_temp', 'precipitation'])
+        values = unpack_values(self.horizon)
+        self.assertEqual(to_floats(values['yhat']), [100.5, 200.25, None, 400.0])
+        self.assertEqual(to_floats(values['precipitation']), [0.0, 1.5, None, 0.0])
+
+    def test_slice(self):
+        days = slice_horizon(self.horizon, date(2024, 5, 2), date(2024, 5, 4))
+        self.assertEqual(days['dates'], [date(2024, 5, 2), date(2024, 5, 3)])
+        self.assertEqual(to_floats(days['yhat']), [200.25, None])
+
+    def test_slice_is_clamped_to_the_horizon(self):
+        days = slice_horizon(self.horizon, date(2024, 4, 1), date(2024, 6, 1))
+        self.assertEqual(len(days['dates']), 4)
+        days = slice_horizon(self.horizon, date(2024, 6, 1), date(2024, 6, 5))
+        self.assertEqual(days['dates'], [])
+        self.assertEqual(len(days['yhat']), 0)
+
+
+@override_settings(PREDICTION_STORAGE='rows')
+class RecordActualsTests(TestCase):
+    def setUp(self):
+        self.location = Location.objects.create(name='Test Park')
+        self.day = date(2024, 5, 10)
+        SevenDayPrediction.objects.create(
+            location=self.location, date=self.day, value=100.0, issued_on=self.day - timedelta(days=2)
+        )
+        AttendancePrediction.objects.create(
+            location=self.location, date=self.day, value=90.0, issued_on=self.day - timedelta(days=30)
+        )
+        self.attendance = DailyAttendance.objects.create(
+            location=self.location, date=self.day, count=110, high_temp=72.0, precipitation=0.0
+        )
+
+    def aggregate(self, source, horizon):
+        return AccuracyAggregate.objects.get(location=self.location, source=source, horizon=horizon)
+
+    def test_scores_each_source(self):
+        record_actuals(self.location.pk, [self.day])
+        seven_day = self.aggregate('seven_day', 2)
+        self.assertEqual((seven_day.count, seven_day.sum_error), (1, 10.0))
+        daily = self.aggregate('daily', 30)
+        self.assertEqual((daily.count, daily.sum_error), (1, 20.0))
+
+    def test_correction_backs_out_the_old_score(self):
+        record_actuals(self.location.pk, [self.day])
+        self.attendance.count = 80
+        self.attendance.save()
+        record_actuals(self.location.pk, [self.day])
+        seven_day = self.aggregate('seven_day', 2)
+        self.assertEqual((seven_day.count, seven_day.sum_error, seven_day.sum_abs_error), (1, -20.0, 20.0))
+
+    def test_snapshot_scores_predictions_dropped_from_the_window(self):
+        snapshot_expiring_predictions(self.location.pk, self.day + timedelta(days=1))
+        AttendancePrediction.objects.filter(location=self.location).delete()
+        record_actuals(self.location.pk, [self.day])
+        daily = self.aggregate('daily', 30)
+        self.assertEqual((daily.count, daily.sum_error), (1, 20.0))
+
+
+class RefreshToleranceTests(TestCase):
+    def setUp(self):
+        self.location = Location.objects.create(name='Test Park')
+        self.today = date(2024, 5, 10)
+        self.stored = {self.today - timedelta(days=1): 50.0, self.today: 100.0, self.today + timedelta(days=1): 200.0}
+
+    def forecast(self):
+        # Yesterday drops out, today moves within the tolerance, tomorrow beyond it and a new day is added
+        dates = [self.today, self.today + timedelta(days=1), self.today + timedelta(days=2)]
+        return pd.DataFrame({
+            'ds': pd.to_datetime(dates), 'yhat': [100.5, 210.0, 300.0],
+            'yhat_lower': [90.0, 190.0, 280.0], 'yhat_upper': [110.0, 230.0, 320.0],
+        })
+
+    @override_settings(PREDICTION_STORAGE='rows')
+    def test_rows(self):
+        AttendancePrediction.objects.bulk_create([
+            AttendancePrediction(location=self.location, date=d, value=value, issued_on=self.today - timedelta(days=1))
+            for d, value in self.stored.items()
+        ])
+        touched = refresh_attendance_predictions(self.location, self.forecast(), 1.0, self.today)
+        self.assertEqual(touched, {'created': 1, 'updated': 1, 'deleted': 1})
+        values = dict(AttendancePrediction.objects.filter(location=self.location).values_list('date', 'value'))
+        self.assertEqual(list(values.values()), [100.0, 210.0, 300.0])
+
+    @override_settings(PREDICTION_STORAGE='packed')
+    def test_packed(self):
+        stored = pd.DataFrame({'ds': pd.to_datetime(list(self.stored)), 'yhat': list(self.stored.values())})
+        save_packed_attendance_predictions(self.location, stored.assign(yhat_lower=0.0, yhat_upper=0.0),
+                                           False, 1.0, self.today - timedelta(days=1))
+        touched = save_packed_attendance_predictions(self.location, self.forecast(), True, 1.0, self.today)
+        self.assertEqual(touched, {'created': 1, 'updated': 1, 'deleted': 1})
+        days = slice_horizon(get_horizon(self.location, 'daily'))
+        self.assertEqual(days['dates'][0], self.today)
+        self.assertEqual(to_floats(days['yhat']), [100.0, 210.0, 300.0])
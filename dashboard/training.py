@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+DAYS_PER_YEAR = 365.25
+
+
+def recency_weights(ds, half_life_years):
+    """Weight each day by 0.5 per `half_life_years` before the most recent day."""
+    ds = pd.to_datetime(ds)
+    age_years = (ds.max() - ds).dt.days.to_numpy() / DAYS_PER_YEAR
+    return 0.5 ** (age_years / half_life_years)
+
+
+def thin_by_weight(df, weights):
+    """Keep a deterministic sample of rows where each row survives in proportion to its weight.
+
+    Prophet has no sample weights, so down-weighting old days means keeping
+    fewer of them: a row is kept whenever the running weight total, counted
+    back from the newest day, passes another whole number.
+    """
+    order = np.argsort(pd.to_datetime(df['ds']).to_numpy())[::-1]
+    totals = np.floor(np.cumsum(weights[order]) + 1e-9)
+    keep = np.zeros(len(df), dtype=bool)
+    keep[order] = np.diff(totals, prepend=0) > 0
+    return df[keep]
+
+
+def aggregate_weekly(df, cutoff):
+    """Replace the days before `cutoff` with one point per week.
+
+    Every numeric column is averaged over the week, including any calendar
+    feature columns, so a weekly point carries the week's average seasonality.
+    """
+    ds = pd.to_datetime(df['ds'])
+    old, recent = df[ds < cutoff], df[ds >= cutoff]
+    if old.empty:
+        return df
+
+    week = pd.to_datetime(old['ds']).dt.to_period('W').dt.start_time
+    weekly = old.drop(columns='ds').groupby(week.to_numpy()).mean()
+    weekly.insert(0, 'ds', weekly.index)
+    return pd.concat([weekly.reset_index(drop=True), recent], ignore_index=True)
+
+
+def apply_training_window(df, mode='full', years=None):
+    """Trim a training frame to a location's training window.
+
+    'years' keeps the last `years` years, 'weighted' thins days out with a
+    half-life of `years`, and 'weekly' keeps the last `years` years daily and
+    averages anything older into weekly points.
+    """
+    if mode == 'full' or not years or df.empty:
+        return df
+
+    ds = pd.to_datetime(df['ds'])
+    cutoff = ds.max() - pd.Timedelta(days=round(years * DAYS_PER_YEAR))
+    if mode == 'years':
+        return df[ds > cutoff]
+    if mode == 'weighted':
+        return thin_by_weight(df, recency_weights(ds, years))
+    if mode == 'weekly':
+        return aggregate_weekly(df, cutoff)
+    raise ValueError(f"unknown training window '{mode}'")
+
+
+def get_training_window(location):
+    """Get the (mode, years) training window for a location."""
+    if location is None or location.training_window == 'full':
+        return 'full', None
+    return location.training_window, location.training_years
+
+
+def window_sample_weights(df, mode='full', years=None):
+    """Get per-row weights giving a frame the same training window, for models that take weights.
+
+    Days before the window get no weight with 'years', and 1/7 with 'weekly' so
+    they count as much as one weekly point would.
+    """
+    if mode == 'full' or not years or df.empty:
+        return np.ones(len(df))
+
+    ds = pd.to_datetime(df['ds'])
+    if mode == 'weighted':
+        return recency_weights(ds, years)
+    cutoff = ds.max() - pd.Timedelta(days=round(years * DAYS_PER_YEAR))
+    old_weight = 0.0 if mode == 'years' else 1 / 7
+    return np.where(ds > cutoff, 1.0, old_weight)
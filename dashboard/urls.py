@@ -4,5 +4,14 @@ from . import views
 urlpatterns = [
     path('', views.homepage, name='homepage'),
     path('input/', views.input, name='input'),
+    path('input/bulk/', views.bulk_input, name='bulk_input'),
     path('calendar/', views.calendar, name='calendar'),
+    path('scenarios/', views.scenarios, name='scenarios'),
+    path('rollups/', views.rollups, name='rollups'),
+    path('accuracy/', views.accuracy, name='accuracy'),
+    path('intraday/', views.intraday, name='intraday'),
+    path('predictions/', views.predictions, name='predictions'),
+    path('export/<str:dataset>.csv', views.export, name='export'),
+    path('profiles/', views.profiles, name='profiles'),
+    path('profiles/<str:name>', views.profile_download, name='profile_download'),
 ]
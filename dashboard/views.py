@@ -1,39 +1,46 @@
-from django.http import HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
+from django.db import connection, transaction
+from django.conf import settings
+from django.core.cache import cache
+from django.views.decorators.http import require_POST
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-from prophet import Prophet
 from datetime import datetime, timedelta, date
-from meteostat import Point, Daily
 import requests
 import os
+import csv
+import io
+import json
+import threading
 import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'wildcast.settings')
 django.setup()
 
 from dashboard.models import DailyAttendance, Location
+from dashboard.weather import fetch_daily_weather, get_default_location, get_weather_gov_forecast
+from dashboard import forecast_client
+from dashboard.rollups import get_rollups
+from dashboard.exports import EXPORTS, stream_csv
+from dashboard.sqlite import write
+from dashboard.accuracy import get_accuracy_summary, record_actuals
+from dashboard.attendance import has_weather_history, save_daily_counts
+from dashboard.resilience import mark_degraded, track_degraded
+from dashboard.profiling import list_profiles
+from dashboard.intraday import get_day_curve
+from dashboard.horizons import PREDICTION_MODELS, get_prediction_range
 
 
-def get_data():
-    """Load and preprocess the attendance data."""
-    data = pd.read_csv('data/attendance.csv', header=None)
-    data.columns = ['ds', 'y']
-    data['ds'] = pd.to_datetime(data['ds'], yearfirst=True)
-    data['y'] = data['y'].str.replace(',', '')
-    data['y'] = data['y'].astype(float)
-    return data
-
 def get_today():
-    """Get today's date."""
-    return datetime.now().date()
+    """Get today's date at the park."""
+    return get_default_location().local_today()
 
 def get_weather_data(start_date, end_date):
     """Get weather data using meteostat for the given date range."""
-    location = Point(33.0980, -116.9967, 150)
-    weather_data = Daily(location, start_date, end_date)
-    weather_data = weather_data.fetch()
+    weather_data = fetch_daily_weather(None, start_date, end_date)
     
     # Convert to the expected format using daily highs instead of averages
     weather_df = pd.DataFrame({
@@ -45,67 +52,6 @@ def get_weather_data(start_date, end_date):
     
     return weather_df
 
-def get_weather_gov_forecast():
-    """Get weather forecast from Weather.gov API for Safari Park location."""
-    # Safari Park coordinates: 33.0980, -116.9967
-    lat, lon = 33.0980, -116.9967
-    
-    try:
-        # First, get the grid point for this location
-        points_url = f"https://api.weather.gov/points/{lat},{lon}"
-        points_response = requests.get(points_url, headers={'User-Agent': 'WildCast/1.0'})
-        
-        if points_response.status_code != 200:
-            return None
-            
-        points_data = points_response.json()
-        forecast_url = points_data['properties']['forecast']
-        
-        # Get the forecast
-        forecast_response = requests.get(forecast_url, headers={'User-Agent': 'WildCast/1.0'})
-        
-        if forecast_response.status_code != 200:
-            return None
-            
-        forecast_data = forecast_response.json()
-        periods = forecast_data['properties']['periods']
-        
-        # Process the forecast data
-        forecasts = []
-        for period in periods:
-            # Weather.gov returns day/night pairs, we want daily forecasts
-            if period['isDaytime']:
-                date_str = period['startTime'][:10]  # Extract YYYY-MM-DD
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-                
-                # Extract temperature and precipitation info
-                temp = period['temperature']  # Weather.gov already provides daily high for daytime periods
-                
-                # Look for precipitation in detailed forecast
-                precip = 0.0
-                detailed_forecast = period['detailedForecast'].lower()
-                if 'rain' in detailed_forecast or 'shower' in detailed_forecast:
-                    # Simple heuristic for precipitation in mm
-                    if 'heavy' in detailed_forecast:
-                        precip = 12.7  # ~0.5 inches = 12.7mm
-                    elif 'light' in detailed_forecast:
-                        precip = 2.5   # ~0.1 inches = 2.5mm
-                    else:
-                        precip = 6.4   # ~0.25 inches = 6.4mm
-                
-                forecasts.append({
-                    'date': date_obj,
-                    'temperature': temp,  # This is the daily high temperature
-                    'precipitation': precip,
-                    'description': period['shortForecast']
-                })
-        
-        return forecasts
-        
-    except Exception as e:
-        print(f"Weather.gov API error: {e}")
-        return None
-
 def get_forecast_weather_for_date(target_date):
     """Get weather forecast for a specific date using Weather.gov."""
     forecasts = get_weather_gov_forecast()
@@ -129,59 +75,55 @@ def get_forecast_weather_for_date(target_date):
     # If no exact match, return fallback
     return {'temperature': 75.0, 'precipitation': 0.0}  # Default daily high
 
-def get_prediction_for_date(date_param):
-    """Get the attendance prediction for a specific date."""
-    data = get_data()
-
-    # Convert date to datetime if it's a date object
-    if isinstance(date_param, date) and not isinstance(date_param, datetime):
-        date_param = datetime.combine(date_param, datetime.min.time())
+def predict_default_location(dates, temperatures, precipitations):
+    """Predict the default park's attendance for dates with the given weather.
 
-    start_date = data['ds'].min()
-    end_date = data['ds'].max()
-    location = Point(33.0980, -116.9967, 150) # Safari park coordinates
-    weather_data = Daily(location, start_date, end_date)
-    weather_data = weather_data.fetch()
-    
-    m = Prophet()
-    m.add_country_holidays(country_name='US')
-    m.add_regressor('temp', prior_scale=0.1)
-    m.add_regressor('prcp', prior_scale=0.1)
-    data['temp'] = weather_data['tmax'].fillna(0).astype(float).values * 9/5 + 32  # Convert daily high to Fahrenheit
-    data['prcp'] = weather_data['prcp'].fillna(0).astype(float).values
-    m.fit(data)
+    When the forecast server is running but can't answer, the stored daily
+    predictions stand in and the response is marked degraded.
+    """
+    location = get_default_location()
+    try:
+        return forecast_client.predict(location, dates, temperatures, precipitations)
+    except forecast_client.ForecastUnavailable as e:
+        stored = get_prediction_range(location, 'daily', min(dates), max(dates) + timedelta(days=1))
+        by_date = dict(zip(stored['dates'], stored['value']))
+        yhat = np.array([by_date.get(d) for d in dates], dtype=float)
+        if np.isnan(yhat).any():
+            raise
+        print(f"{e}, using the stored predictions")
+        mark_degraded('forecast server')
+        return yhat, yhat, yhat
 
-    future = pd.DataFrame({'ds': [date_param]})
-    future['floor'] = 0
+def get_prediction_for_date(date_param):
+    """Get the attendance prediction for a specific date."""
+    if isinstance(date_param, datetime):
+        date_param = date_param.date()
 
     # Use Weather.gov for future forecasts
     weather_forecast = get_forecast_weather_for_date(date_param)
-    future['temp'] = weather_forecast['temperature']
-    future['prcp'] = weather_forecast['precipitation']
-    temp_display = weather_forecast['temperature']
-    prcp_display = weather_forecast['precipitation']
-
-    forecast = m.predict(future)
+    yhat, lower, upper = predict_default_location(
+        [date_param], [weather_forecast['temperature']], [weather_forecast['precipitation']]
+    )
     return {
         'date': date_param.strftime('%m/%d/%Y'),
-        'prediction': forecast['yhat'].iloc[0],
-        'upper_bound': forecast['yhat_upper'].iloc[0],
-        'lower_bound': forecast['yhat_lower'].iloc[0],
-        'temperature': temp_display,
-        'precipitation': prcp_display
+        'prediction': float(yhat[0]),
+        'upper_bound': float(upper[0]),
+        'lower_bound': float(lower[0]),
+        'temperature': weather_forecast['temperature'],
+        'precipitation': weather_forecast['precipitation']
         } 
 
-def get_todays_prediction():
-    today = get_today()
+def get_todays_prediction(today=None):
+    today = today or get_today()
     return get_prediction_for_date(today)
 
-def get_tomorrows_prediction(): 
-    tomorrow = get_today() + timedelta(days=1)
+def get_tomorrows_prediction(today=None): 
+    tomorrow = (today or get_today()) + timedelta(days=1)
     return get_prediction_for_date(tomorrow)
 
-def get_next_week_prediction():
+def get_next_week_prediction(today=None):
     """Get predictions for the next 7 days as a DataFrame."""
-    today = get_today()
+    today = today or get_today()
     
     # Convert today to datetime for consistency
     if isinstance(today, date) and not isinstance(today, datetime):
@@ -191,25 +133,6 @@ def get_next_week_prediction():
     
     next_week_dates = [today_dt + timedelta(days=i) for i in range(0, 7)]
     
-    # Get the training data with weather
-    data = get_data()
-    start_date = data['ds'].min()
-    end_date = data['ds'].max()
-    location = Point(33.0980, -116.9967, 150)
-    weather_data = Daily(location, start_date, end_date)
-    weather_data = weather_data.fetch()
-    
-    m = Prophet()
-    m.add_country_holidays(country_name='US')
-    m.add_regressor('temp', prior_scale=0.1)
-    m.add_regressor('prcp', prior_scale=0.1)
-    data['temp'] = weather_data['tmax'].fillna(0).astype(float).values * 9/5 + 32  # Convert daily high to Fahrenheit
-    data['prcp'] = weather_data['prcp'].fillna(0).astype(float).values
-    m.fit(data)
-    
-    future = pd.DataFrame({'ds': next_week_dates})
-    future['floor'] = 0
-
     # Get Weather.gov forecasts for the week
     weather_gov_forecasts = get_weather_gov_forecast()
     
@@ -234,57 +157,47 @@ def get_next_week_prediction():
             temperatures.append(75.0)  # Default daily high temperature
             precipitations.append(0.0)  # Default precipitation
     
-    future['temp'] = temperatures
-    future['prcp'] = precipitations
+    yhat, _, _ = predict_default_location(
+        [d.date() for d in next_week_dates], temperatures, precipitations
+    )
+    ds = pd.to_datetime(pd.Series(next_week_dates))
 
-    forecast = m.predict(future)
-    
     predictions_df = pd.DataFrame({
-        'date': forecast['ds'].dt.strftime('%m/%d/%Y'),
-        'day_of_week': forecast['ds'].dt.day_name(),
-        'prediction': forecast['yhat'],
+        'date': ds.dt.strftime('%m/%d/%Y'),
+        'day_of_week': ds.dt.day_name(),
+        'prediction': yhat,
         'temperature': temperatures,
         'precipitation': precipitations
     })
     
     return predictions_df
 
-def get_plot():
-    """Generate and save the forecast plot."""
+def get_plot(today=None):
+    """Generate and save the forecast plot for a day, reusing it if it already exists."""
     import os
     import matplotlib
     matplotlib.use('Agg')  # Use non-interactive backend
     import matplotlib.pyplot as plt
     
-    # Get the training data with weather
-    data = get_data()
-    start_date = data['ds'].min()
-    end_date = data['ds'].max()
-    location = Point(33.0980, -116.9967, 150)
-    weather_data = Daily(location, start_date, end_date)
-    weather_data = weather_data.fetch()
-    
-    m = Prophet()
-    m.add_country_holidays(country_name='US')
-    m.add_regressor('temp', prior_scale=0.1)
-    m.add_regressor('prcp', prior_scale=0.1)
-    data['temp'] = weather_data['tmax'].fillna(0).astype(float).values * 9/5 + 32  # Convert daily high to Fahrenheit
-    data['prcp'] = weather_data['prcp'].fillna(0).astype(float).values
-    m.fit(data)
-    
-    # Convert get_today() to datetime for consistency
-    today = get_today()
+    today = today or get_today()
+    static_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+    plot_name = f"forecast_plot_{today:%Y%m%d}.png"
+    if os.path.exists(os.path.join(static_dir, plot_name)):
+        return f"static/{plot_name}"
+    
+    # Convert today to datetime for consistency
     if isinstance(today, date) and not isinstance(today, datetime):
         today_dt = datetime.combine(today, datetime.min.time())
     else:
         today_dt = today
     
     # Create future dates starting from today for next 30 days
-    plotdf = pd.DataFrame({'ds': pd.date_range(start=today_dt, periods=30)})
-    plotdf['floor'] = 0
-    plotdf['temp'] = 75.0  # Default daily high temperature
-    plotdf['prcp'] = 0.0   # Default precipitation
-    forecast = m.predict(plotdf)
+    dates = pd.date_range(start=today_dt, periods=30)
+    # Default daily high temperature and no precipitation
+    yhat, lower, upper = predict_default_location(
+        [d.date() for d in dates], [75.0] * len(dates), [0.0] * len(dates)
+    )
+    forecast = pd.DataFrame({'ds': dates, 'yhat': yhat, 'yhat_lower': lower, 'yhat_upper': upper})
     
     # Create a custom plot with only future data
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -305,22 +218,24 @@ def get_plot():
     plt.tight_layout()
     
     # Save the plot
-    static_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
     if not os.path.exists(static_dir):
         os.makedirs(static_dir)
     
-    plot_path = os.path.join(static_dir, 'forecast_plot.png')
+    plot_path = os.path.join(static_dir, plot_name)
     plt.savefig(plot_path, dpi=150, bbox_inches='tight')
     plt.close()
     
-    return 'static/forecast_plot.png'
+    # Clean up plots from before yesterday
+    for old_plot in os.listdir(static_dir):
+        if old_plot.startswith('forecast_plot_') and old_plot < f"forecast_plot_{today - timedelta(days=1):%Y%m%d}":
+            os.remove(os.path.join(static_dir, old_plot))
+    
+    return f"static/{plot_name}"
     
 def get_historical_weather_for_date(target_date):
     """Get historical weather data for a specific date."""
     try:
-        location = Point(33.0980, -116.9967, 150)
-        weather_data = Daily(location, target_date, target_date)
-        weather_data = weather_data.fetch()
+        weather_data = fetch_daily_weather(None, target_date, target_date)
         
         if not weather_data.empty:
             temp = weather_data['tmax'].fillna(70).astype(float).iloc[0] * 9/5 + 32  # Daily high in Fahrenheit
@@ -331,6 +246,168 @@ def get_historical_weather_for_date(target_date):
     except Exception:
         return {'temperature': 75.0, 'precipitation': 0.0}
 
+def get_historical_weather_for_range(start_date, end_date, location=None):
+    """Get historical weather data for every date in a range with a single lookup."""
+    weather = {}
+    try:
+        weather_data = fetch_daily_weather(
+            location,
+            datetime.combine(start_date, datetime.min.time()),
+            datetime.combine(end_date, datetime.min.time())
+        )
+
+        temps = weather_data['tmax'].fillna(70).astype(float) * 9/5 + 32  # Daily high in Fahrenheit
+        precs = weather_data['prcp'].fillna(0).astype(float)
+        for ts, temp, prec in zip(weather_data.index, temps, precs):
+            weather[ts.date()] = {'temperature': temp, 'precipitation': prec}
+    except Exception as e:
+        print(f"Meteostat error: {e}")
+    return weather
+
+def parse_attendance_date(date_str):
+    """Parse an attendance date in any of the formats we accept from staff."""
+    for fmt in ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y'):
+        try:
+            return datetime.strptime(date_str.strip(), fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"could not parse date '{date_str}'")
+
+def parse_bulk_attendance(request):
+    """Read (date, count) rows from an uploaded file or a CSV/JSON request body.
+
+    Returns a dict of date -> count (later rows win) and a list of row errors.
+    Raises ValueError if the body isn't valid JSON of the expected shape.
+    """
+    upload = request.FILES.get('file')
+    if upload is not None:
+        body = upload.read().decode('utf-8-sig')
+        is_json = upload.name.lower().endswith('.json')
+    else:
+        body = request.body.decode('utf-8-sig')
+        is_json = request.content_type == 'application/json'
+
+    if is_json:
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+        if isinstance(payload, dict):
+            payload = payload.get('rows', [])
+        if not isinstance(payload, list) or not all(isinstance(item, dict) for item in payload):
+            raise ValueError('expected a list of {"date", "attendance"} objects, or an object with a "rows" list of them')
+        rows = [
+            (item.get('date'), item.get('attendance', item.get('count')))
+            for item in payload
+        ]
+    else:
+        rows = [row[:2] for row in csv.reader(io.StringIO(body)) if row]
+        if rows and rows[0][0].strip().lower() == 'date':
+            rows = rows[1:]  # Skip header row
+
+    counts = {}
+    errors = []
+    for line, row in enumerate(rows, start=1):
+        try:
+            date_str, attendance = row
+            date_obj = parse_attendance_date(str(date_str))
+            attendance_count = int(str(attendance).replace(',', ''))
+            if attendance_count < 0:
+                raise ValueError("attendance can't be negative")
+            counts[date_obj] = attendance_count
+        except (TypeError, ValueError) as e:
+            errors.append(f"Row {line}: {e}")
+    return counts, errors
+
+def enrich_attendance_weather(location_id, dates):
+    """Fill high_temp/precipitation for the given attendance dates in one ranged lookup."""
+    try:
+        location = Location.objects.get(pk=location_id)
+        weather = get_historical_weather_for_range(min(dates), max(dates), location)
+        entries = list(DailyAttendance.objects.filter(location_id=location_id, date__in=dates))
+        for entry in entries:
+            weather_data = weather.get(entry.date, {'temperature': 75.0, 'precipitation': 0.0})
+            entry.high_temp = weather_data['temperature']
+            entry.precipitation = weather_data['precipitation']
+        write(DailyAttendance.objects.bulk_update, entries, ['high_temp', 'precipitation'], batch_size=500)
+        # The weather bins need the observed weather, so score the days again
+        write(record_actuals, location_id, dates)
+    finally:
+        connection.close()
+
+def upsert_attendance(location, counts):
+    """Bulk create or update attendance counts. Returns (created, updated) row counts."""
+    created, updated = save_daily_counts(location, counts)
+
+    # Weather is looked up once for the whole span after the rows are committed
+    dates = list(counts.keys())
+    transaction.on_commit(lambda: threading.Thread(
+        target=enrich_attendance_weather, args=(location.id, dates), daemon=True
+    ).start())
+
+    return created, updated
+
+@require_POST
+def bulk_input(request):
+    """Upsert many attendance rows at once and enrich them with weather afterwards."""
+    location_name = request.GET.get('location', 'Safari Park')
+    from_form = 'file' in request.FILES
+
+    try:
+        location = Location.objects.get(name=location_name)
+        counts, errors = parse_bulk_attendance(request)
+    except Location.DoesNotExist:
+        counts, errors = {}, [f"{location_name} location not found in database."]
+    except ValueError as e:
+        counts, errors = {}, [f"Error processing data: {e}"]
+
+    if not counts and not errors:
+        errors = ["No attendance rows found."]
+
+    if errors:
+        if from_form:
+            return render(request, 'dashboard/input.html', {'error': '; '.join(errors)})
+        return JsonResponse({'errors': errors}, status=400)
+
+    created, updated = write(upsert_attendance, location, counts)
+
+    result = {
+        'rows': len(counts),
+        'created': created,
+        'updated': updated,
+        'start': min(counts).isoformat(),
+        'end': max(counts).isoformat(),
+    }
+    if from_form:
+        return render(request, 'dashboard/input.html', {
+            'success': f"Uploaded {result['rows']} days of attendance data "
+                       f"({result['created']} added, {result['updated']} updated). "
+                       f"Weather data is being filled in.",
+            'recent_entries': DailyAttendance.objects.filter(location=location).order_by('-date')[:10],
+        })
+    return JsonResponse(result)
+
+def save_attendance(date_obj, location_name, attendance_count, weather_data):
+    """Create or update one day's attendance. Returns True if the row was created."""
+    # Check if entry already exists and update or create
+    entry, created = DailyAttendance.objects.get_or_create(
+        date=date_obj,
+        location=Location.objects.get(name=location_name),
+        defaults={
+            'count': attendance_count,
+            'high_temp': weather_data['temperature'],
+            'precipitation': weather_data['precipitation']
+        }
+    )
+
+    if not created:
+        # Update existing entry
+        entry.count = attendance_count
+        entry.high_temp = weather_data['temperature']
+        entry.precipitation = weather_data['precipitation']
+        entry.save()
+    return created
+
 def input(request):
     context = {}
     
@@ -346,23 +423,9 @@ def input(request):
                 # Get historical weather data for this date
                 weather_data = get_historical_weather_for_date(date_obj)
                 
-                # Check if entry already exists and update or create
-                entry, created = DailyAttendance.objects.get_or_create(
-                    date=date_obj,
-                    location=Location.objects.get(name='Safari Park'),
-                    defaults={
-                        'count': attendance_count,
-                        'high_temp': weather_data['temperature'],
-                        'precipitation': weather_data['precipitation']
-                    }
-                )
+                created = write(save_attendance, date_obj, 'Safari Park', attendance_count, weather_data)
                 
                 if not created:
-                    # Update existing entry
-                    entry.count = attendance_count
-                    entry.high_temp = weather_data['temperature']
-                    entry.precipitation = weather_data['precipitation']
-                    entry.save()
                     context['success'] = f"Updated attendance data for {date_obj.strftime('%B %d, %Y')} with {attendance_count} visitors!"
                 else:
                     context['success'] = f"Added attendance data for {date_obj.strftime('%B %d, %Y')} with {attendance_count} visitors!"
@@ -385,21 +448,170 @@ def input(request):
     
     return render(request, 'dashboard/input.html', context)
 
+def parse_float_list(value, default):
+    """Parse a comma-separated query parameter into a list of finite floats."""
+    if not value:
+        return default
+    values = [float(v) for v in value.split(',') if v.strip()]
+    if not np.isfinite(values).all():
+        raise ValueError(f"'{value}' must only contain finite numbers")
+    return values
+
+def scenarios(request):
+    """Return predicted attendance for a grid of dates x high temperatures x precipitation."""
+    try:
+        location = Location.objects.get(name=request.GET.get('location', 'Safari Park'))
+        temperatures = parse_float_list(request.GET.get('temps'), [70.0, 95.0])
+        precipitations = parse_float_list(request.GET.get('precips'), [0.0, 6.4])
+        days = int(request.GET.get('days', 14))
+        start = request.GET.get('start')
+        start_date = parse_attendance_date(start) if start else get_today()
+    except Location.DoesNotExist:
+        return JsonResponse({'error': 'Location not found in database.'}, status=404)
+    except ValueError as e:
+        return JsonResponse({'error': f"Error processing scenario: {e}"}, status=400)
+
+    if not 1 <= days <= 366 or len(temperatures) * len(precipitations) > 2500:
+        return JsonResponse({'error': 'Scenario grid is too large.'}, status=400)
+    if not has_weather_history(location):
+        return JsonResponse({'error': f"No attendance history with weather for {location.name} yet."}, status=404)
+
+    dates = [start_date + timedelta(days=i) for i in range(days)]
+    try:
+        predictions = forecast_client.predict_scenarios(location, dates, temperatures, precipitations)
+    except forecast_client.ForecastUnavailable as e:
+        return JsonResponse({'error': f"Scenarios are unavailable right now: {e}"}, status=503)
+
+    return JsonResponse({
+        'location': location.name,
+        'dates': [d.isoformat() for d in dates],
+        'temperatures': temperatures,
+        'precipitations': precipitations,
+        # predictions[date][temperature][precipitation]
+        'predictions': np.round(predictions).astype(int).tolist(),
+    })
+
+def rollups(request):
+    """Return weekly or monthly attendance rollups with year-over-year comparisons."""
+    try:
+        location = Location.objects.get(name=request.GET.get('location', 'Safari Park'))
+        period = request.GET.get('period', 'month')
+        source = request.GET.get('source', 'actual')
+        end = request.GET.get('end')
+        end_date = parse_attendance_date(end) if end else get_today()
+        start = request.GET.get('start')
+        start_date = parse_attendance_date(start) if start else end_date.replace(year=end_date.year - 1)
+    except Location.DoesNotExist:
+        return JsonResponse({'error': 'Location not found in database.'}, status=404)
+    except ValueError as e:
+        return JsonResponse({'error': f"Error processing range: {e}"}, status=400)
+
+    if period not in ('week', 'month') or source not in ('actual', 'predicted'):
+        return JsonResponse({'error': 'Unknown period or source.'}, status=400)
+
+    return JsonResponse({
+        'location': location.name,
+        'period': period,
+        'source': source,
+        'rollups': get_rollups(location, period, start_date, end_date, source),
+    })
+
+def predictions(request):
+    """Return a location's latest stored predictions for a range of days, a year ahead by default."""
+    try:
+        location = Location.objects.get(name=request.GET.get('location', 'Safari Park'))
+        kind = request.GET.get('kind', 'daily')
+        start = request.GET.get('start')
+        start_date = parse_attendance_date(start) if start else location.local_today()
+        end = request.GET.get('end')
+        end_date = parse_attendance_date(end) if end else start_date + timedelta(days=365)
+    except Location.DoesNotExist:
+        return JsonResponse({'error': 'Location not found in database.'}, status=404)
+    except ValueError as e:
+        return JsonResponse({'error': f"Error processing range: {e}"}, status=400)
+
+    if kind not in PREDICTION_MODELS:
+        return JsonResponse({'error': 'Unknown prediction kind.'}, status=400)
+
+    # end is exclusive, so the default is exactly 365 days
+    days = get_prediction_range(location, kind, start_date, end_date)
+    return JsonResponse({
+        'location': location.name,
+        'kind': kind,
+        **days,
+        'dates': [d.isoformat() for d in days['dates']],
+    })
+
+@staff_member_required
+def export(request, dataset):
+    """Stream a full dataset as CSV without loading it into memory."""
+    if dataset not in EXPORTS:
+        raise Http404(f"Unknown export '{dataset}'")
+
+    return StreamingHttpResponse(
+        stream_csv(dataset),
+        content_type='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{dataset}.csv"'},
+    )
+
+def intraday(request):
+    """Return a day's hourly arrivals, actual and predicted, for staffing."""
+    try:
+        location = Location.objects.get(name=request.GET.get('location', 'Safari Park'))
+        day = request.GET.get('date')
+        day = parse_attendance_date(day) if day else location.local_today()
+    except Location.DoesNotExist:
+        return JsonResponse({'error': 'Location not found in database.'}, status=404)
+    except ValueError as e:
+        return JsonResponse({'error': f"Error processing date: {e}"}, status=400)
+
+    return JsonResponse({'location': location.name, **get_day_curve(location, day)})
+
+@staff_member_required
+def profiles(request):
+    """List the sampling profiles captured from requests, scripts and commands."""
+    return render(request, 'dashboard/profiles.html', {'profiles': list_profiles()})
+
+@staff_member_required
+def profile_download(request, name):
+    if name not in {profile['name'] for profile in list_profiles()}:
+        raise Http404(f"Unknown profile '{name}'")
+    return FileResponse(open(os.path.join(settings.PROFILE_DIR, name), 'rb'), as_attachment=True)
+
+def accuracy(request):
+    """Return the running forecast accuracy by horizon and residuals by weather."""
+    try:
+        location = Location.objects.get(name=request.GET.get('location', 'Safari Park'))
+    except Location.DoesNotExist:
+        return JsonResponse({'error': 'Location not found in database.'}, status=404)
+
+    return JsonResponse({'location': location.name, **get_accuracy_summary(location)})
+
 def calendar(request):
     return render(request, 'dashboard/calendar.html')
 
-def homepage(request):
-    """Return a nicely formatted hello world message with predictions."""
-    
-    # Get both today's and tomorrow's predictions
-    todays_data = get_todays_prediction()
-    tomorrows_data = get_tomorrows_prediction()
-    
-    # Get next week's predictions
-    next_week_df = get_next_week_prediction()
-    
-    # Generate the forecast plot
-    plot_path = get_plot()
+def get_homepage_context(today=None, refresh=False):
+    """Build the homepage predictions for a day, cached so they're computed once per day.
+
+    The scheduler calls this with tomorrow's date shortly before midnight, so
+    the first visitor of the day finds everything already in the cache.
+    """
+    today = today or get_today()
+    cache_key = f"homepage:{today.isoformat()}"
+    context = None if refresh else cache.get(cache_key)
+    if context is not None:
+        return context
+
+    with track_degraded() as degraded:
+        # Get both today's and tomorrow's predictions
+        todays_data = get_todays_prediction(today)
+        tomorrows_data = get_tomorrows_prediction(today)
+
+        # Get next week's predictions
+        next_week_df = get_next_week_prediction(today)
+
+        # Generate the forecast plot
+        plot_path = get_plot(today)
     
     # Find busiest and slowest days
     busiest_day = next_week_df.loc[next_week_df['prediction'].idxmax()]
@@ -415,6 +627,18 @@ def homepage(request):
         'busiest_day': busiest_day,
         'slowest_day': slowest_day,
         'plot_path': plot_path,
+        'degraded': sorted(degraded),
     }
+    # Predictions made from fallback weather are only kept until the next forecast refresh
+    timeout = settings.WEATHER_FORECAST_CACHE_SECONDS if degraded else settings.PREDICTION_CACHE_SECONDS
+    cache.set(cache_key, context, timeout)
     
+    return context
+
+def homepage(request):
+    """Return a nicely formatted hello world message with predictions."""
+    context = get_homepage_context()
+    # Cached predictions made from fallback weather still mark the response
+    for reason in context.get('degraded', []):
+        mark_degraded(reason)
     return render(request, 'dashboard/homepage.html', context)
@@ -0,0 +1,271 @@
+from datetime import datetime
+from django.conf import settings
+from django.core.cache import cache
+from meteostat import Point, Daily, Stations
+import requests
+
+from dashboard.models import Location
+from dashboard.resilience import (
+    CircuitBreaker, DeadlineExceeded, UpstreamUnavailable, call_with_deadline, mark_degraded, remaining,
+    request_timeout,
+)
+
+# Safari Park coordinates, used for locations that haven't been given their own
+DEFAULT_COORDINATES = (33.0980, -116.9967, 150)
+
+WEATHER_GOV_HEADERS = {'User-Agent': 'WildCast/1.0'}
+
+weather_gov_breaker = CircuitBreaker('weather.gov')
+meteostat_breaker = CircuitBreaker('meteostat')
+
+
+def weather_gov_get(url):
+    """GET a Weather.gov URL within the request deadline, through its circuit breaker."""
+    remaining()
+
+    def get():
+        timeout, capped = request_timeout()
+        try:
+            response = requests.get(url, headers=WEATHER_GOV_HEADERS, timeout=timeout)
+        except requests.Timeout as e:
+            # Only a timeout that had the full per-call allowance counts against Weather.gov
+            if capped:
+                raise DeadlineExceeded(f"Weather.gov call cut short by the request deadline ({e})") from e
+            raise
+        # Server errors mean an outage; anything else is an answer about this location
+        if response.status_code >= 500:
+            response.raise_for_status()
+        return response
+
+    return weather_gov_breaker.call(get)
+
+
+def meteostat_fetch(fetch):
+    """Run a meteostat fetch within the request deadline, through its circuit breaker.
+
+    meteostat downloads when a query is constructed, so `fetch` builds and fetches it.
+    """
+    remaining()
+    return meteostat_breaker.call(call_with_deadline, fetch)
+
+
+def is_empty(value):
+    """Whether an upstream answer has nothing in it: None, an empty list or an empty DataFrame."""
+    return value is None or (value.empty if hasattr(value, 'empty') else not value)
+
+
+def get_with_last_known_good(cache_key, fetch, reason, timeout):
+    """Get a cached upstream value, falling back to the last good copy when the upstream fails.
+
+    Every successful, non-empty fetch is also kept without expiry, so an outage
+    or open circuit serves that copy straight away and marks the response as
+    degraded. An empty answer is never cached and gives way to that copy too.
+    """
+    value = cache.get(cache_key)
+    if value is not None:
+        return value
+
+    try:
+        value = fetch()
+    except (UpstreamUnavailable, requests.RequestException) as e:
+        mark_degraded(reason)
+        value = cache.get(f"{cache_key}:last-good")
+        if value is None:
+            raise
+        print(f"{reason} unavailable ({e}), serving last known good data")
+        return value
+
+    if is_empty(value):
+        last_good = cache.get(f"{cache_key}:last-good")
+        if last_good is None:
+            return value
+        mark_degraded(reason)
+        print(f"{reason} returned no data, serving last known good data")
+        return last_good
+
+    cache.set(cache_key, value, timeout)
+    cache.set(f"{cache_key}:last-good", value, None)
+    return value
+
+
+def get_default_location():
+    """Get the Safari Park location, or an unsaved stand-in if it isn't in the database."""
+    try:
+        return Location.objects.get(name='Safari Park')
+    except Location.DoesNotExist:
+        lat, lon, elevation = DEFAULT_COORDINATES
+        return Location(name='Safari Park', latitude=lat, longitude=lon, elevation=elevation)
+
+
+def get_coordinates(location):
+    """Get the (lat, lon, elevation) for a location, falling back to Safari Park."""
+    if location.latitude is None or location.longitude is None:
+        return DEFAULT_COORDINATES
+    return location.latitude, location.longitude, location.elevation
+
+
+def resolve_gridpoint(location):
+    """Resolve and store the Weather.gov gridpoint that covers a location."""
+    if location.forecast_gridpoint and location.forecast_url:
+        return location.forecast_gridpoint
+
+    lat, lon, _ = get_coordinates(location)
+    points_url = f"https://api.weather.gov/points/{lat},{lon}"
+    points_response = weather_gov_get(points_url)
+
+    if points_response.status_code != 200:
+        return None
+
+    properties = points_response.json()['properties']
+    location.forecast_gridpoint = f"{properties['gridId']}/{properties['gridX']},{properties['gridY']}"
+    location.forecast_url = properties['forecast']
+    if location.pk:
+        location.save(update_fields=['forecast_gridpoint', 'forecast_url'])
+    return location.forecast_gridpoint
+
+
+def resolve_weather_station(location):
+    """Resolve and store the meteostat station nearest to a location."""
+    if location.weather_station:
+        return location.weather_station
+
+    lat, lon, _ = get_coordinates(location)
+    stations = meteostat_fetch(lambda: Stations().nearby(lat, lon).fetch(1))
+
+    if stations.empty:
+        return None
+
+    location.weather_station = str(stations.index[0])
+    if location.pk:
+        location.save(update_fields=['weather_station'])
+    return location.weather_station
+
+
+def parse_weather_gov_forecast(forecast_data):
+    """Turn a Weather.gov forecast response into daily high/precipitation forecasts."""
+    periods = forecast_data['properties']['periods']
+
+    forecasts = []
+    for period in periods:
+        # Weather.gov returns day/night pairs, we want daily forecasts
+        if period['isDaytime']:
+            date_str = period['startTime'][:10]  # Extract YYYY-MM-DD
+            date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+
+            # Extract temperature and precipitation info
+            temp = period['temperature']  # Weather.gov already provides daily high for daytime periods
+
+            # Look for precipitation in detailed forecast
+            precip = 0.0
+            detailed_forecast = period['detailedForecast'].lower()
+            if 'rain' in detailed_forecast or 'shower' in detailed_forecast:
+                # Simple heuristic for precipitation in mm
+                if 'heavy' in detailed_forecast:
+                    precip = 12.7  # ~0.5 inches = 12.7mm
+                elif 'light' in detailed_forecast:
+                    precip = 2.5   # ~0.1 inches = 2.5mm
+                else:
+                    precip = 6.4   # ~0.25 inches = 6.4mm
+
+            forecasts.append({
+                'date': date_obj,
+                'temperature': temp,  # This is the daily high temperature
+                'precipitation': precip,
+                'description': period['shortForecast']
+            })
+
+    return forecasts
+
+
+def get_gridpoint_forecast(gridpoint, forecast_url):
+    """Get the daily forecast for a Weather.gov gridpoint, shared by every location in it."""
+    def fetch():
+        forecast_response = weather_gov_get(forecast_url)
+        if forecast_response.status_code != 200:
+            return None
+        return parse_weather_gov_forecast(forecast_response.json())
+
+    forecasts = get_with_last_known_good(
+        f"weather-gov:{gridpoint}", fetch, 'weather.gov', settings.WEATHER_FORECAST_CACHE_SECONDS
+    )
+    if not forecasts:
+        # Callers fill in typical weather, so the response is degraded like any other fallback
+        mark_degraded('weather.gov')
+    return forecasts
+
+
+def get_weather_gov_forecast(location=None):
+    """Get weather forecast from Weather.gov API for a location (Safari Park by default)."""
+    if location is None:
+        location = get_default_location()
+
+    try:
+        gridpoint = resolve_gridpoint(location)
+        if gridpoint is None:
+            mark_degraded('weather.gov')
+            return None
+        return get_gridpoint_forecast(gridpoint, location.forecast_url)
+
+    except Exception as e:
+        print(f"Weather.gov API error: {e}")
+        mark_degraded('weather.gov')
+        return None
+
+
+def get_forecasts_for_locations(locations):
+    """Get Weather.gov forecasts for many locations with one request per gridpoint.
+
+    Returns a dict of location id -> forecasts (None when unavailable).
+    """
+    by_gridpoint = {}
+    results = {}
+    for location in locations:
+        try:
+            gridpoint = resolve_gridpoint(location)
+        except Exception as e:
+            print(f"Weather.gov API error: {e}")
+            mark_degraded('weather.gov')
+            gridpoint = None
+
+        if gridpoint is None:
+            mark_degraded('weather.gov')
+            results[location.pk] = None
+        else:
+            by_gridpoint.setdefault((gridpoint, location.forecast_url), []).append(location)
+
+    for (gridpoint, forecast_url), grid_locations in by_gridpoint.items():
+        try:
+            forecasts = get_gridpoint_forecast(gridpoint, forecast_url)
+        except Exception as e:
+            print(f"Weather.gov API error: {e}")
+            mark_degraded('weather.gov')
+            forecasts = None
+        for location in grid_locations:
+            results[location.pk] = forecasts
+
+    return results
+
+
+def fetch_daily_weather(location, start_date, end_date):
+    """Get meteostat daily history for a location, keyed by its nearest station.
+
+    Locations that share a station share the cached result, so the upstream
+    lookup happens once per station and date range.
+    """
+    if location is None:
+        location = get_default_location()
+
+    try:
+        station = resolve_weather_station(location)
+    except Exception as e:
+        print(f"Meteostat error: {e}")
+        station = None
+
+    if station is None:
+        return meteostat_fetch(lambda: Daily(Point(*get_coordinates(location)), start_date, end_date).fetch())
+
+    return get_with_last_known_good(
+        f"meteostat:{station}:{start_date:%Y%m%d}:{end_date:%Y%m%d}",
+        lambda: meteostat_fetch(lambda: Daily(station, start_date, end_date).fetch()),
+        'meteostat', settings.WEATHER_HISTORY_CACHE_SECONDS,
+    )
@@ -10,6 +10,10 @@ django.setup()
 
 from dashboard.models import DailyAttendance
 from dashboard.models import Location
+from dashboard.profiling import profile_script
+
+# Run with --profile (or --profile=collapsed) to save a sampling profile of the load
+profile_script('loaddb')
 
 cords = Point(33.0980, -116.9967, 150) # Safari park coordinates
 
@@ -55,6 +55,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'dashboard.middleware.DeadlineMiddleware',
+    'dashboard.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'wildcast.urls'
@@ -80,14 +82,79 @@ WSGI_APPLICATION = 'wildcast.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Concurrent mode puts SQLite in WAL with a busy timeout (see dashboard/sqlite.py),
+# reuses connections and funnels each process's writes through one writer thread
+SQLITE_CONCURRENT_MODE = os.environ.get('WILDCAST_SQLITE_CONCURRENT', 'true').lower() == 'true'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600 if SQLITE_CONCURRENT_MODE else 0,
+        'CONN_HEALTH_CHECKS': SQLITE_CONCURRENT_MODE,
+        'OPTIONS': {
+            'timeout': 20,
+            # Take the write lock up front so writers queue instead of deadlocking
+            'transaction_mode': 'IMMEDIATE',
+        } if SQLITE_CONCURRENT_MODE else {},
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+    }
+}
+
+# Upstream weather lookups are shared by every location in the same gridpoint/station
+WEATHER_FORECAST_CACHE_SECONDS = 15 * 60
+WEATHER_HISTORY_CACHE_SECONDS = 6 * 60 * 60
+
+# Upstream weather calls in one request share this budget (see dashboard/resilience.py)
+REQUEST_DEADLINE_SECONDS = 10
+UPSTREAM_CONNECT_TIMEOUT = 3.05
+UPSTREAM_READ_TIMEOUT = 8
+# Consecutive failures before an upstream is skipped, and how long until it's retried
+CIRCUIT_BREAKER_FAILURES = 3
+CIRCUIT_BREAKER_RESET_SECONDS = 60
+
+# Precomputed holiday and seasonality features (see dashboard/features.py)
+FEATURE_CACHE_DIR = BASE_DIR / '.cache' / 'features'
+# Fitted Prophet models, keyed by the history they were fitted on
+MODEL_CACHE_DIR = BASE_DIR / '.cache' / 'models'
+
+# 'per_location' fits a Prophet model per park; 'global' publishes from one pooled
+# model over every park (dashboard/global_model.py, see `manage.py compare_global_model`)
+FORECAST_MODE = os.environ.get('WILDCAST_FORECAST_MODE', 'per_location')
+
+# 'rows' stores a row per predicted day; 'packed' stores each run as one row of
+# float32 arrays (dashboard/horizons.py, convert with `manage.py pack_predictions`)
+PREDICTION_STORAGE = os.environ.get('WILDCAST_PREDICTION_STORAGE', 'rows')
+
+# Web workers ask `manage.py forecast_server` for predictions over this socket,
+# and predict in-process when it isn't running
+FORECAST_SERVER_ENABLED = os.environ.get('WILDCAST_FORECAST_SERVER', 'true').lower() == 'true'
+FORECAST_SERVER_SOCKET = os.environ.get('WILDCAST_FORECAST_SOCKET', str(BASE_DIR / '.cache' / 'forecast.sock'))
+FORECAST_SERVER_TIMEOUT = 30
+
+# On-demand sampling profiles (?profile=1 for staff, or --profile on scripts and commands)
+PROFILE_DIR = BASE_DIR / '.cache' / 'profiles'
+PROFILE_FORMAT = 'speedscope'  # or 'collapsed'
+PROFILE_INTERVAL_SECONDS = 0.005
+PROFILE_MAX_FILES = 200
+PROFILE_MAX_BYTES = 100 * 1024 * 1024
+
+# Homepage predictions are cached per day and pre-warmed by `manage.py run_scheduler`
+PREDICTION_CACHE_SECONDS = 26 * 60 * 60
+SCHEDULER_ROLLOVER_CRON = '50 23 * * *'  # In each location's local time
+SCHEDULER_REFRESH_CRON = '0 6-22 * * *'  # Pick up newer Weather.gov forecasts during the day
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 